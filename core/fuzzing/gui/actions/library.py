@@ -1,25 +1,134 @@
+import re
 import time
 import random
 import subprocess
 import logging
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.fuzzing.spawn import spawn_kwargs
+
+# act_targeted_click 대상 Role 및 수집 상한 (random.choice 용으로 충분한 개수)
+CLICK_TARGET_ROLES = {"push button", "menu", "menu item", "page tab"}
+MAX_CLICK_TARGETS = 32
+# 버튼/탭/메뉴 항목의 하위는 클릭 대상이 아니므로 펼치지 않음 ("menu"는 하위가 곧 메뉴 항목이라 제외)
+CLICK_PRUNE_ROLES = CLICK_TARGET_ROLES - {"menu"}
+# act_targeted_click 탐색 깊이 상한 (Electron 웹 콘텐츠 아래의 깊은 트리를 끝까지 훑지 않도록)
+CLICK_MAX_DEPTH = 10
+# AT-SPI 속성 조회 워커 수 (at-spi2-registryd 포화 방지). 실제 pyatspi 호출은 _ATSPI_LOCK으로 직렬화됨
+ATTR_POOL_WORKERS = 8
+# pyatspi(libatspi)는 스레드 안전하지 않으므로 풀 워커의 모든 조회를 호출 단위로 이 락 안에서 수행
+_ATSPI_LOCK = threading.Lock()
+# 같은 UI 상태에서 후보 스캔 결과를 재사용하는 최대 시간(초)
+CANDIDATE_CACHE_TTL = 5.0
+
+def compile_keywords(words):
+    """
+    키워드 집합을 하나의 정규식(이스케이프된 alternation)으로 컴파일.
+    `any(k in name for k in words)`를 이름 길이에 비례하는 단일 스캔으로 대체합니다.
+    빈 집합이면 어떤 문자열과도 매치되지 않는 패턴을 반환합니다.
+    """
+    if not words:
+        return re.compile(r"(?!)")
+    return re.compile("|".join(map(re.escape, sorted(words, key=len, reverse=True))))
+
+# 대화상자의 긍정 버튼(Save/OK 등) 판별용
+POSITIVE_BUTTON_RE = compile_keywords(['save', 'ok', 'open', 'create'])
+
+# 저장/인쇄/삭제 계열 핫키는 뜨는 팝업을 엔터로 승인해야 함
+CONFIRM_KEYS = frozenset(['s', 'p', 'delete'])
+
+def compile_hotkeys(actions):
+    """
+    설정의 actions 항목을 {action_name: (xdotool key spec, 설명, 팝업 승인 필요 여부)}로 변환.
+    설정 로드 시점에 한 번만 호출합니다.
+    """
+    table = {}
+    for name, combo_data in actions.items():
+        keys, desc = combo_data[0], combo_data[1]
+        table[name] = ('+'.join(keys), desc, not CONFIRM_KEYS.isdisjoint(keys))
+    return table
+
+def _read_role_name(node):
+    with _ATSPI_LOCK:
+        try: return node.roleName, node.name
+        except: return None, None
+
+def _read_children(node):
+    with _ATSPI_LOCK:
+        try: return node.children
+        except: return []
 
 class FuzzerActions:
     def __init__(self, fuzzer_instance):
         self.fuzzer = fuzzer_instance
         self.logger = logging.getLogger("FuzzerActions")
+        self._attr_pool = ThreadPoolExecutor(max_workers=ATTR_POOL_WORKERS)
+        # {ui_state_hash: (스캔 시각, 후보 리스트)}
+        self._cand_cache = {}
 
-    def xdo(self, args):
-        try: subprocess.run(["xdotool"] + args, check=False)
+    def close(self):
+        """속성 조회 풀 종료. 응답 없는 D-Bus 호출에 묶여 종료가 지연되지 않도록 대기하지 않음"""
+        self._attr_pool.shutdown(wait=False, cancel_futures=True)
+
+    def xdo(self, *commands):
+        """
+        하나 이상의 xdotool 명령을 체이닝하여 프로세스 하나로 실행합니다.
+        예: xdo(["type", "--args", "1", text], ["key", "Return"]) -> xdotool type --args 1 <text> key Return
+        type은 기본적으로 남은 인자를 모두 입력할 텍스트로 취급하므로, 뒤에 명령이 이어지면
+        반드시 --args 1로 인자 개수를 지정해야 함 (마지막 명령일 때는 생략 가능)
+        명령 사이 대기는 ["sleep", "0.5"]로 xdotool 내부에서 처리합니다.
+        """
+        args = [arg for command in commands for arg in command]
+        try: subprocess.run(["xdotool"] + args, check=False, **spawn_kwargs("xdotool"))
         except: pass
 
+    def _walk(self, root, max_depth=None, prune=None):
+        """
+        레벨 단위 BFS 제너레이터: (node, depth, role, name)을 지연 생성합니다.
+        prune(role, name)이 참인 노드는 생성하되 그 자식은 조회하지 않습니다.
+        소비자가 중간에 멈추면 이후 레벨의 D-Bus 조회는 일어나지 않으며,
+        한 레벨의 role/name 및 자식 조회는 스레드 풀로 보내되, 각 pyatspi 호출은 _ATSPI_LOCK으로 직렬화됩니다.
+        레벨 결과를 모두 받은 뒤에 yield하므로 소비자(메인 스레드)의 pyatspi 호출이 워커와 겹치지 않습니다.
+        """
+        level, depth = [root], 0
+        while level:
+            alive = []
+            for node, (role, name) in zip(level, list(self._attr_pool.map(_read_role_name, level))):
+                if role is None: continue # 조회 실패 노드는 건너뜀 (하위도 탐색 안 함)
+                if prune is None or not prune(role, name):
+                    alive.append(node)
+                yield node, depth, role, name
+            if max_depth is not None and depth >= max_depth: return
+            level = [c for children in self._attr_pool.map(_read_children, alive) for c in children]
+            depth += 1
+
     def _get_interactable_elements(self):
-        """[Ultra-Safe] BFS 탐색 (Recursive 제거)"""
-        candidates = []
+        """
+        현재 UI 상태(윈도우 제목 해시)별로 스캔 결과를 캐시합니다.
+        UI가 바뀌지 않은 틱에서는 수백 번의 AT-SPI 호출 대신 xdotool 한 번으로 끝납니다.
+        """
         if not self.fuzzer.app_node: 
             self.logger.warning("[Crawl-Debug] App node is None!")
             return []
 
+        now = time.time()
+        state_key = self.fuzzer.get_current_ui_state()
+        cached = self._cand_cache.get(state_key)
+        if cached and now - cached[0] < CANDIDATE_CACHE_TTL:
+            return cached[1]
+
+        candidates = self._scan_interactable_elements()
+        if state_key != "STATE_UNKNOWN":
+            # 만료된 항목 정리 후 저장 (상태 수만큼만 유지)
+            self._cand_cache = {k: v for k, v in self._cand_cache.items() if now - v[0] < CANDIDATE_CACHE_TTL}
+            self._cand_cache[state_key] = (now, candidates)
+        return candidates
+
+    def _scan_interactable_elements(self):
+        """[Ultra-Safe] BFS 탐색 (Recursive 제거)"""
+        candidates = []
         try:
             # 1. 시작점: 활성 윈도우 찾기 (직계 자식만 검색)
             print("[DEBUG-LIB] Finding active window...", file=sys.stderr)
@@ -31,9 +140,10 @@ class FuzzerActions:
             
             print(f"[DEBUG-LIB] Active window: {active_window.name if active_window else 'None'}", file=sys.stderr)
 
-            # 2. 수동 BFS (recursive=True 사용 안 함)
-            queue = [(active_window, 0)]
+            # 2. 수동 BFS (recursive=True 사용 안 함, 최대 깊이 3)
             visited = set()
+            # 구조 해시용 시그니처: 스캔 순서대로 (role, name, depth)
+            signature = []
             
             # Electron 앱에서 유효한 Role들
             target_roles = {'push button', 'menu', 'page tab', 'entry', 'link', 'document web', 'section', 'toggle button'}
@@ -42,47 +152,50 @@ class FuzzerActions:
             scanned_count = 0
 
             print("[DEBUG-LIB] Starting BFS loop...", file=sys.stderr)
-            while queue and scanned_count < scan_limit:
-                curr_node, depth = queue.pop(0)
+            for curr_node, depth, role, raw_name in self._walk(active_window, max_depth=3):
+                if scanned_count >= scan_limit: break
                 
-                # 노드 식별자 생성 (Hashable하게)
+                # 속성 스냅샷: 프로퍼티 접근마다 D-Bus Get이 발생하므로 노드당 한 번씩만 읽음
                 try:
-                    node_id = (curr_node.name, curr_node.roleName, str(curr_node.position))
+                    position = curr_node.position
+                    # 노드 식별자 생성 (Hashable하게)
+                    node_id = (raw_name, role, str(position))
                     if node_id in visited: continue
                     visited.add(node_id)
                 except: continue
                 
+                scan_index = scanned_count
                 scanned_count += 1
 
                 # 후보 등록
                 try:
-                    role = curr_node.roleName
+                    name = raw_name.lower() if raw_name else ""
+                    signature.append((role, name, depth))
                     if role in target_roles:
-                        # 좌표 유효성 체크
-                        x, y = curr_node.position
+                        # 좌표 유효성 체크 (size는 후보 Role일 때만 조회)
+                        x, y = position
                         w, h = curr_node.size
                         if w > 0 and h > 0 and 0 <= x <= 1920 and 0 <= y <= 1080:
-                            name = curr_node.name.lower() if curr_node.name else ""
                             score = 1.0
-                            if any(k in name for k in self.fuzzer.knowledge_base): score += 10.0
+                            if self.fuzzer.kb_matcher.search(name): score += 10.0
                             
-                            candidates.append((curr_node, score, f"{name}_{role}_{x}_{y}"))
+                            candidates.append((curr_node, score, name, role, scan_index))
                 except: pass # 개별 노드 에러 무시
-
-                # 자식 노드 큐에 추가 (최대 깊이 3)
-                if depth < 3:
-                    try:
-                        # children 속성 접근 자체가 느릴 수 있으므로 타임아웃 고려 (여기선 try-except로 방어)
-                        for child in curr_node.children:
-                            queue.append((child, depth + 1))
-                    except: pass
             
             print(f"[DEBUG-LIB] Scan finished. Found {len(candidates)} candidates.", file=sys.stderr)
                     
         except Exception as e:
             print(f"[DEBUG-LIB] Critical Error: {e}", file=sys.stderr)
-            self.logger.error(f"UI Scan Critical Error: {e}")
+            self.logger.error("UI Scan Critical Error: %s", e)
+            signature = []
         
+        # 노드 식별자는 좌표 대신 (구조 해시, 스캔 위치) 기반:
+        # 같은 구조로 다시 렌더링된 화면의 같은 요소는 같은 식별자를 갖게 되어 반복으로 취급됨.
+        # 문자열 조립 대신 intern된 이름/Role 튜플 -> 틱마다 새 문자열 할당 없이 해시 비교
+        struct_hash = hash(tuple(signature)) & 0xffffffff
+        candidates = [(node, score, (sys.intern(name), sys.intern(role), struct_hash, idx))
+                      for node, score, name, role, idx in candidates]
+
         # 결과 반환
         candidates.sort(key=lambda x: x[1], reverse=True)
         return candidates
@@ -110,24 +223,21 @@ class FuzzerActions:
             dest_x = random.randint(0, 1920)
             dest_y = random.randint(0, 1080)
             
-            self.logger.info(f"[Action] Drag & Drop -> '{target.name}' from ({start_x},{start_y}) to ({dest_x},{dest_y})")
+            self.logger.info("[Action] Drag & Drop -> '%s' from (%d,%d) to (%d,%d)", target.name, start_x, start_y, dest_x, dest_y)
             
             # 3. 드래그 수행 (xdotool 사용)
             # mousemove (시작점) -> mousedown (1번버튼) -> mousemove (끝점) -> mouseup
-            self.xdo(["mousemove", str(start_x), str(start_y)])
-            time.sleep(0.2)
-            self.xdo(["mousedown", "1"])
-            time.sleep(0.5) # 드래그 중 체류 시간
-            self.xdo(["mousemove", str(dest_x), str(dest_y)])
-            time.sleep(0.5)
-            self.xdo(["mouseup", "1"])
+            self.xdo(["mousemove", str(start_x), str(start_y)], ["sleep", "0.2"],
+                     ["mousedown", "1"], ["sleep", "0.5"], # 드래그 중 체류 시간
+                     ["mousemove", str(dest_x), str(dest_y)], ["sleep", "0.5"],
+                     ["mouseup", "1"])
             
             # 상태 추적 업데이트
-            self.fuzzer.interacted_elements.add(node_hash)
+            self.fuzzer.mark_interacted(node_hash)
             return True
             
         except Exception as e:
-            self.logger.warning(f"[Drag] Failed: {e}")
+            self.logger.warning("[Drag] Failed: %s", e)
             return False
 
     def act_menu_exploration(self):
@@ -153,12 +263,8 @@ class FuzzerActions:
             
             # 3. 펼쳐진 메뉴 아이템 스캔 및 클릭
             steps = random.randint(1, 5)
-            for _ in range(steps):
-                self.xdo(["key", "Down"])
-                time.sleep(0.1)
-            
-            self.xdo(["key", "Return"])
-            self.logger.info(f"[Action] Menu Exploration -> Opened menu and clicked item {steps}")
+            self.xdo(*([["key", "Down"], ["sleep", "0.1"]] * steps), ["key", "Return"])
+            self.logger.info("[Action] Menu Exploration -> Opened menu and clicked item %d", steps)
             return True
             
         except: return False
@@ -171,7 +277,7 @@ class FuzzerActions:
         target, score, node_hash = random.choice(candidates[:5]) if len(candidates) > 5 else random.choice(candidates)
         
         try:
-            self.logger.info(f"[Action] UI Crawl -> Activating '{target.name}' ({target.roleName})")
+            self.logger.info("[Action] UI Crawl -> Activating '%s' (%s)", target.name, target.roleName)
             
             # [FIX] 마우스 클릭 대신 키보드 실행 시도 (Robustness 강화)
             try:
@@ -184,11 +290,11 @@ class FuzzerActions:
                 # 포커스 실패 시 마우스 클릭으로 Fallback
                 target.click()
 
-            self.fuzzer.interacted_elements.add(node_hash)
+            self.fuzzer.mark_interacted(node_hash)
             if target.roleName == 'menu': time.sleep(0.5)
             return True
         except Exception as e:
-            self.logger.warning(f"[Crawl] Interaction failed: {e}")
+            self.logger.warning("[Crawl] Interaction failed: %s", e)
             return False
 
     def act_ui_input(self):
@@ -197,15 +303,14 @@ class FuzzerActions:
             if not text_fields: return False
             target = random.choice(text_fields)
             
-            self.logger.info(f"[Action] UI Input -> Typing into '{target.name}'")
+            self.logger.info("[Action] UI Input -> Typing into '%s'", target.name)
             target.grabFocus()
             time.sleep(0.2)
             
             payloads = ["test", "admin", "1234", "file:///etc/passwd", "javascript:alert(1)"]
             text = random.choice(payloads)
             
-            self.xdo(["type", text])
-            self.xdo(["key", "Return"])
+            self.xdo(["type", "--args", "1", text], ["key", "Return"])
             return True
         except: return False
 
@@ -232,8 +337,8 @@ class FuzzerActions:
             # Gedit은 헤더바에 버튼이 있을 수 있음
             buttons = active.findChildren(lambda x: x.roleName == 'push button', recursive=True)
             for btn in buttons:
-                if any(k in btn.name.lower() for k in ['save', 'ok', 'open', 'create']):
-                    self.logger.info(f"    -> Clicking positive button: {btn.name}")
+                if POSITIVE_BUTTON_RE.search(btn.name.lower()):
+                    self.logger.info("    -> Clicking positive button: %s", btn.name)
                     btn.click()
                     return True
             
@@ -248,29 +353,35 @@ class FuzzerActions:
         keys = ["Tab", "Right", "Down"]
         k = random.choice(keys)
         self.xdo(["key", k])
-        self.logger.info(f"[Action] Navigation -> {k}")
+        self.logger.info("[Action] Navigation -> %s", k)
         return True
 
     def act_escape(self):
         self.xdo(["key", "Escape"])
-        self.logger.info(f"[Action] Escape State")
+        self.logger.info("[Action] Escape State")
         return True
 
     def act_targeted_click(self):
         targets = []
         if not self.fuzzer.app_node: return False
+        kb_search = self.fuzzer.kb_matcher.search
+        def is_target(role, name):
+            return role in CLICK_TARGET_ROLES and kb_search(name.lower() if name else "")
+        def prune(role, name):
+            return role in CLICK_PRUNE_ROLES or is_target(role, name)
+        # findChildren(recursive=True)는 전체 트리를 D-Bus로 끌어오므로,
+        # 목표 개수를 채우면 즉시 멈추고, 대상/리프 노드의 하위와 CLICK_MAX_DEPTH 아래는 조회하지 않는 지연 BFS(_walk)로 대체
         try:
-            for child in self.fuzzer.app_node.findChildren(recursive=True):
-                if child.roleName in ["push button", "menu", "menu item", "page tab"]:
-                    name = child.name.lower() if child.name else ""
-                    if any(k in name for k in self.fuzzer.knowledge_base):
-                        targets.append(child)
+            for node, _, role, name in self._walk(self.fuzzer.app_node, max_depth=CLICK_MAX_DEPTH, prune=prune):
+                if is_target(role, name):
+                    targets.append(node)
+                    if len(targets) >= MAX_CLICK_TARGETS: break
         except: pass
         if targets:
             t = random.choice(targets)
             try:
                 t.click()
-                self.logger.info(f"[Action] Targeted Click -> '{t.name}'")
+                self.logger.info("[Action] Targeted Click -> '%s'", t.name)
                 return True
             except: return False
         return False
@@ -279,7 +390,7 @@ class FuzzerActions:
         w, h = 1920, 1080
         try:
             # Try to get actual screen geometry
-            out = subprocess.check_output(["xdotool", "getdisplaygeometry"], stderr=subprocess.DEVNULL).decode().split()
+            out = subprocess.check_output(["xdotool", "getdisplaygeometry"], stderr=subprocess.DEVNULL, **spawn_kwargs("xdotool")).decode().split()
             w, h = int(out[0]), int(out[1])
         except: pass
         
@@ -288,21 +399,17 @@ class FuzzerActions:
 
     def act_hotkey(self, action_name):
         """설정 파일 기반 핫키 주입"""
-        actions = self.fuzzer.target_config.get("actions", {})
-        if action_name not in actions:
+        hotkey = self.fuzzer.hotkeys.get(action_name)
+        if hotkey is None:
             return False
         
-        combo_data = actions[action_name] # [["ctrl", "s"], "Description"]
-        keys = combo_data[0]
-        desc = combo_data[1]
+        spec, desc, needs_confirm = hotkey # ("ctrl+s", "Description", True)
         
-        self.xdo(["key"] + ([f"{'+'.join(keys)}"]))
-        self.logger.info(f"[Action] Hotkey Injection -> {desc}")
+        commands = [["key", spec], ["sleep", "1"]]
+        # 팝업 승인 (엔터) - 같은 xdotool 프로세스 안에서 이어서 처리
+        if needs_confirm:
+            commands += [["key", "Return"], ["sleep", "0.5"], ["key", "Return"]]
         
-        time.sleep(1.0)
-        # 팝업 승인 (엔터)
-        if 's' in keys or 'p' in keys or 'delete' in keys:
-            self.xdo(["key", "Return"])
-            time.sleep(0.5)
-            self.xdo(["key", "Return"])
-        return True
+        self.xdo(*commands)
+        self.logger.info("[Action] Hotkey Injection -> %s", desc)
+        return True
\ No newline at end of file
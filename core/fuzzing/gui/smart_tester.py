@@ -1,10 +1,13 @@
+import atexit
 import time
 import random
 import logging
 import os
 import hashlib
+import re
 import subprocess
 import sys
+import threading
 import traceback
 
 def exception_handler(type, value, tb):
@@ -12,21 +15,82 @@ def exception_handler(type, value, tb):
 
 sys.excepthook = exception_handler
 
+import glob
 import json
-from collections import defaultdict
+import queue
+import tempfile
+import signal
+from logging.handlers import QueueHandler, QueueListener
+from collections import OrderedDict
 from core.fuzzing.ipc import FeedbackClient
 
 # [Check] 디렉토리 구조가 core/fuzzing/gui/actions/library.py 인지 확인 필요
-from core.fuzzing.gui.actions.library import FuzzerActions
+from core.fuzzing.gui.actions.library import FuzzerActions, compile_keywords, compile_hotkeys
+from core.fuzzing.spawn import spawn_kwargs
+
+# dpkg -L 출력의 각 줄에서 basename의 마지막 확장자를 뗀 이름 추출 (os.path.splitext와 동일)
+DPKG_NAME_RE = re.compile(rb'(?m)/([^/\n]+?)(?:\.[^./\n]*)?$')
+DPKG_INFO_DIR = "/var/lib/dpkg/info"
+# 공유 /tmp 대신 사용자 캐시 디렉토리 (orchestrator의 dpkg 소유자 캐시와 같은 위치)
+KB_CACHE_DIR = os.path.expanduser("~/.cache/fuzzing")
+
+# 로그 포맷은 orchestrator의 [Action] 파싱 및 통계 스크립트가 의존하므로 변경 금지
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+def setup_async_logging(log_path):
+    """
+    메인 루프는 큐에 레코드를 넣기만 하고, 파일 쓰기는 QueueListener 스레드가 담당합니다.
+    orchestrator는 SIGTERM으로 퍼저를 종료하므로 그때도 큐에 남은 로그를 비운 뒤 종료합니다.
+    """
+    # SimpleQueue.put은 재진입 안전 -> 시그널 핸들러가 끼어들어도 교착 없음
+    log_queue = queue.SimpleQueue()
+    file_handler = logging.FileHandler(log_path)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = QueueListener(log_queue, file_handler)
+    listener.start()
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(QueueHandler(log_queue))
+    atexit.register(listener.stop)
+
+    def flush_and_terminate(signum, frame):
+        listener.stop()
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+    try: signal.signal(signal.SIGTERM, flush_and_terminate)
+    except ValueError: pass # 메인 스레드가 아닌 경우
+    return listener
 
 try:
     import dogtail.tree
     import dogtail.rawinput
     from dogtail.config import config
+    import pyatspi
+    from gi.repository import GLib
 except ImportError:
     pass
 
+_DESKTOP = None
+
+def get_desktop():
+    """
+    AT-SPI 레지스트리의 데스크톱 루트를 프로세스 전체에서 하나만 생성해 공유.
+    (dogtail.tree.root와 같은 객체 -> 조회할 때마다 프록시를 새로 만들지 않음)
+    """
+    global _DESKTOP
+    if _DESKTOP is None:
+        _DESKTOP = pyatspi.Registry.getDesktop(0)
+    return _DESKTOP
+
 class IntelligentFuzzer:
+    # interacted_elements / state_visits 상한 (LRU)
+    MAX_INTERACTED = 4096
+    MAX_STATES = 8192
+    # 행동 후 안정화 대기 (초): 변화가 있으면 최소값, 아무 일 없는 틱마다 2배씩 최대값까지
+    SETTLE_MIN = 0.2
+    SETTLE_MAX = 2.0
+
     def __init__(self, app_name, duration=60, config_path="target_config.json"):
         self.app_name = app_name
         self.duration = duration
@@ -36,23 +100,25 @@ class IntelligentFuzzer:
         # [RL State]
         self.last_score = 0
         self.last_action = None
-        self.state_visits = defaultdict(int)
-        self.interacted_elements = set()
+        self.state_visits = OrderedDict() # {ui_state_hash: 방문 횟수} (LRU, 최대 MAX_STATES개)
+        self.states_discovered = 0 # 처음 본 상태 누적 수 (state_visits는 상한이 있어 len으로 대신 못함)
+        self.interacted_elements = OrderedDict() # 상호작용한 노드 식별자 (LRU, 최대 MAX_INTERACTED개)
         self.current_ui_hash = "INIT"
 
-        # [Logic] 행동 반복 횟수 추적 (지루함 구현용)
-        self.action_counts = defaultdict(int)
+        # [Logic] 연속 반복 횟수 (지루함 구현용, 행동별 누적 횟수는 Q-Table과 함께 초기화)
         self.consecutive_repeats = 0 # 연속 반복 횟수
+        self.settle_timeout = self.SETTLE_MIN
 
         # [Config]
         self.target_config = {}
+        self.hotkeys = {} # 설정 로드 시 컴파일된 핫키 테이블 (compile_hotkeys)
         self._load_config(config_path)
         
         # [Library] 행동 라이브러리 연결
         self.actions = FuzzerActions(self)
         
-        # Q-Table (초기값 조정: UI 탐색에 더 높은 기대값 부여)
-        self.q_values = {
+        # Q-Table 초기값 (UI 탐색에 더 높은 기대값 부여)
+        initial_q = {
             "ui_crawl": 20.0,       # [Up] 10.0 -> 20.0 (탐색 장려)
             "ui_input": 15.0,       # [Up] 8.0 -> 15.0
             "menu_exploration": 25.0, # [Up] 메뉴는 매우 중요함
@@ -64,20 +130,32 @@ class IntelligentFuzzer:
         if self.target_config:
             for action_name in self.target_config.get("actions", {}):
                 # 핫키는 너무 남발하지 않도록 초기값 유지
-                self.q_values[action_name] = 5.0
+                initial_q[action_name] = 5.0
+
+        # [RL] 행동 집합은 여기서 고정됨 -> 문자열 키 대신 정수 인덱스 배열로 Q-Table 관리
+        self.action_names = tuple(initial_q)
+        self.action_index = {name: i for i, name in enumerate(self.action_names)}
+        self.q_table = [initial_q[name] for name in self.action_names]
+        self.action_counts = [0] * len(self.action_names) # 행동 반복 횟수 추적
+        self._top2 = None # 피로도 반영 Q 상위 2개 (best, runner-up) 캐시, None이면 재계산
 
         self.epsilon = 0.5 
         self.alpha = 0.4
         self.knowledge_base = set()
+        self.kb_matcher = compile_keywords(self.knowledge_base)
         self.app_node = None
+        self._desktop = None
         self.running = False
         
         log_path = os.environ.get("FUZZER_LOG_PATH", f"/tmp/fuzzer_debug_{os.getpid()}.log")
-        logging.basicConfig(filename=log_path, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        self._log_listener = setup_async_logging(log_path)
         
         if 'dogtail' in globals():
-            config.defaultDelay = 0.5
-            config.searchCutoffCount = 10
+            self._desktop = get_desktop()
+            # 탐색은 직접 BFS로 하고 대기도 명시적으로 하므로,
+            # dogtail의 검색 재시도와 동작마다 붙는 암묵적 지연은 끔
+            config.defaultDelay = 0
+            config.searchCutoffCount = 1
 
     def _load_config(self, path):
         try:
@@ -90,60 +168,201 @@ class IntelligentFuzzer:
                 for key, cfg in full_config.items():
                     if key in normalized_name:
                         self.target_config = cfg
-                        self.logger.info(f"[Config] Loaded profile for {key}")
+                        # 설정은 이후 읽기 전용 -> xdotool 키 문자열을 여기서 미리 생성
+                        self.hotkeys = compile_hotkeys(cfg.get("actions", {}))
+                        self.logger.info("[Config] Loaded profile for %s", key)
                         break
         except Exception as e:
-            self.logger.error(f"[-] Config load failed: {e}")
+            self.logger.error("[-] Config load failed: %s", e)
+
+    @staticmethod
+    def _kb_list_stamp(pkg_name):
+        """dpkg 파일 목록(.list)의 mtime_ns. 멀티아치 패키지는 {pkg}:<arch>.list 로 설치됨. 없으면 None"""
+        candidates = [os.path.join(DPKG_INFO_DIR, f"{pkg_name}.list")]
+        candidates += sorted(glob.glob(os.path.join(DPKG_INFO_DIR, glob.escape(pkg_name) + ":*.list")))
+        for list_path in candidates:
+            try: return os.stat(list_path).st_mtime_ns
+            except OSError: continue
+        return None
+
+    def _load_kb_cache(self, cache_path, stamp):
+        """패키지 파일 목록이 바뀌지 않았으면 이전 실행의 결과를 재사용. 손상/불일치면 None -> dpkg 재실행"""
+        if stamp is None: return None
+        try:
+            with open(cache_path, 'r') as f:
+                cached = json.load(f)
+            if cached.get("list_mtime_ns") == stamp:
+                return [str(name) for name in cached["kb"]]
+        except Exception:
+            pass
+        return None
+
+    def _save_kb_cache(self, cache_path, stamp, knowledge_base):
+        """임시 파일에 쓴 뒤 os.replace -> 중단되거나 동시에 쓰여도 반쪽짜리 캐시가 남지 않음"""
+        if stamp is None: return
+        try:
+            os.makedirs(KB_CACHE_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=KB_CACHE_DIR, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({"list_mtime_ns": stamp, "kb": sorted(knowledge_base)}, f)
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                try: os.unlink(tmp_path)
+                except OSError: pass
+                raise
+        except Exception as e:
+            self.logger.warning("[RL-Init] KB cache write failed: %s", e)
 
     def _learn_from_dpkg(self):
+        """start()에서 connect()와 병렬로 백그라운드 스레드에서 실행됩니다."""
         self.logger.info("[RL-Init] Learning from Static Analysis (dpkg)...")
+        # 메인 스레드가 읽는 도중 바뀌지 않도록 새 집합에 모은 뒤 한 번에 교체
+        knowledge_base = set(self.knowledge_base)
+        pkg_name = self.target_config.get("package_name", self.app_name.lower())
+        cache_path = os.path.join(KB_CACHE_DIR, "kb_" + re.sub(r'[^A-Za-z0-9_.+-]', '_', pkg_name) + ".json")
+        stamp = self._kb_list_stamp(pkg_name)
+        cached = self._load_kb_cache(cache_path, stamp)
+        if cached is not None:
+            knowledge_base.update(cached)
+        else:
+            try:
+                cmd = ["dpkg", "-L", pkg_name]
+                out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
+                # 줄 단위 파이썬 루프 대신 bytes 위에서 정규식 한 번으로 추출
+                for name in set(DPKG_NAME_RE.findall(out)):
+                    if len(name) > 4:
+                        knowledge_base.add(name.decode(errors='ignore').lower())
+                knowledge_base.update(["save", "download", "print", "log", "cache", "history", "settings", "clear"])
+                self._save_kb_cache(cache_path, stamp, knowledge_base)
+            except: pass
+        # 노드 이름 매칭은 매 틱 수행되므로 KB 전체를 하나의 매처로 컴파일
+        kb_matcher = compile_keywords(knowledge_base)
+        self.knowledge_base, self.kb_matcher = knowledge_base, kb_matcher
+
+    def visit_state(self, state):
+        """상태 방문 횟수를 1 늘려 반환. 오래 보지 않은 상태부터 제거해 메모리를 일정하게 유지"""
+        count = self.state_visits.get(state, 0) + 1
+        self.state_visits[state] = count
+        self.state_visits.move_to_end(state)
+        if len(self.state_visits) > self.MAX_STATES:
+            self.state_visits.popitem(last=False)
+        return count
+
+    def mark_interacted(self, node_id):
+        """상호작용한 노드 기록. 장시간 실행 시 메모리가 무한히 늘지 않도록 오래된 것부터 제거"""
+        self.interacted_elements[node_id] = None
+        self.interacted_elements.move_to_end(node_id)
+        if len(self.interacted_elements) > self.MAX_INTERACTED:
+            self.interacted_elements.popitem(last=False)
+
+    # connect() 대기 중 앱 등장을 알리는 AT-SPI 이벤트
+    APP_EVENTS = ('object:children-changed:add', 'window:create')
+
+    def _find_app(self, targets):
+        # 데스크톱의 직계 자식이 곧 애플리케이션 -> applications()의 Role 판별 왕복 생략
+        for app in self._desktop.children:
+            # app.name은 D-Bus 왕복 -> 앱당 한 번만 읽고 소문자화
+            app_name = app.name
+            app_name_lower = app_name.lower()
+            if any(target in app_name_lower for target in targets):
+                self.app_node = app
+                self.logger.info("[+] Connected to UI Tree: %s", app_name)
+                return True
+        return False
+
+    def _watch_app_events(self, appeared, targets):
+        """
+        앱/윈도우 생성 이벤트를 구독해 타겟이 보이면 appeared를 set합니다.
+        성공 시 구독 해제 함수를, pyatspi를 쓸 수 없으면 None을 반환합니다.
+        pyatspi는 스레드 안전하지 않으므로 Registry.start() 스레드를 띄우지 않고,
+        이벤트는 connect()가 _pump_app_events()로 메인 스레드에서 직접 디스패치합니다.
+        """
+        if 'pyatspi' not in globals(): return None
+
+        def on_event(event):
+            try: name = event.host_application.name.lower()
+            except Exception: return
+            if any(target in name for target in targets):
+                appeared.set()
+
         try:
-            pkg_name = self.target_config.get("package_name", self.app_name.lower())
-            cmd = ["dpkg", "-L", pkg_name]
-            out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL).decode()
-            for line in out.splitlines():
-                basename = os.path.basename(line)
-                name, _ = os.path.splitext(basename)
-                if len(name) > 4 and "/" not in name:
-                    self.knowledge_base.add(name.lower())
-            self.knowledge_base.update(["save", "download", "print", "log", "cache", "history", "settings", "clear"])
-        except: pass
+            pyatspi.Registry.registerEventListener(on_event, *self.APP_EVENTS)
+        except Exception as e:
+            self.logger.warning("[-] AT-SPI event subscription failed, falling back to polling: %s", e)
+            return None
+
+        def unwatch():
+            try: pyatspi.Registry.deregisterEventListener(on_event, *self.APP_EVENTS)
+            except Exception: pass
+        return unwatch
+
+    @staticmethod
+    def _pump_app_events(appeared, timeout):
+        """
+        GLib 기본 컨텍스트를 최대 timeout초 동안 돌려 AT-SPI 이벤트를 메인 스레드에서 처리합니다.
+        타겟 이벤트(appeared)가 오면 즉시 반환. 타이머 소스가 블로킹 iteration을 깨워 대기 시간을 보장
+        """
+        context = GLib.MainContext.default()
+        expired = []
+        timer_id = GLib.timeout_add(int(timeout * 1000), lambda: expired.append(True))
+        try:
+            while not expired and not appeared.is_set():
+                context.iteration(True)
+        finally:
+            if not expired: GLib.source_remove(timer_id)
 
     def connect(self):
-        self.logger.info(f"[*] SmartFuzzer looking for app: {self.app_name}")
-        start_wait = time.time()
+        self.logger.info("[*] SmartFuzzer looking for app: %s", self.app_name)
+        deadline = time.monotonic() + 30
+        # 매칭 기준(앱 이름, 패키지 이름)은 대기 중 변하지 않으므로 한 번만 정규화
         target_pkg = self.target_config.get("package_name", self.app_name).lower()
+        targets = (self.app_name.lower(), target_pkg)
+
+        # 매초 전체 앱 목록을 D-Bus로 훑는 대신 생성 이벤트로 깨어남.
+        # 이벤트를 놓치는 경우를 대비해 긴 주기의 재확인은 유지
+        appeared = threading.Event()
+        unwatch = self._watch_app_events(appeared, targets)
+        recheck_interval = 5.0 if unwatch else 1.0
         
-        while time.time() - start_wait < 30:
-            try:
-                for app in dogtail.tree.root.applications():
-                    name_match = self.app_name.lower() in app.name.lower()
-                    pkg_match = target_pkg in app.name.lower()
-                    if name_match or pkg_match:
-                        self.app_node = app
-                        self.logger.info(f"[+] Connected to UI Tree: {app.name}")
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    if self._find_app(targets):
                         return True
-                time.sleep(1)
-            except: time.sleep(1)
+                except: pass
+                if unwatch:
+                    self._pump_app_events(appeared, recheck_interval)
+                else:
+                    time.sleep(recheck_interval)
+                appeared.clear()
+        finally:
+            if unwatch: unwatch()
         
-        self.logger.error(f"[-] Failed to find app '{self.app_name}' in UI tree.")
+        self.logger.error("[-] Failed to find app '%s' in UI tree.", self.app_name)
         print(f"[-] TIMEOUT: Could not find '{self.app_name}'.", file=sys.stderr)
         return False
 
     def get_current_ui_state(self):
         try:
-            win_title = subprocess.check_output(["xdotool", "getactivewindow", "getwindowname"], stderr=subprocess.DEVNULL).decode().strip()
+            win_title = subprocess.check_output(["xdotool", "getactivewindow", "getwindowname"], stderr=subprocess.DEVNULL, **spawn_kwargs("xdotool")).decode().strip()
             return hashlib.md5(f"WIN:[{win_title}]".encode()).hexdigest()
         except: return "STATE_UNKNOWN"
 
     def wait_for_state_change(self, old_state_hash, timeout=2.0):
-        start = time.time()
-        while time.time() - start < timeout:
+        deadline = time.monotonic() + timeout
+        while True:
             current_hash = self.get_current_ui_state()
             if current_hash != old_state_hash:
                 time.sleep(0.2)
                 return current_hash
-            time.sleep(0.5)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: break
+            # 고정 sleep 대신 피드백 대기 (창 제목은 0.2초마다 재확인):
+            # 아티팩트가 들어오면 짧게 안정화 후 즉시 다음 스텝
+            if self.feedback.wait(min(0.2, remaining)):
+                time.sleep(0.2)
+                return self.get_current_ui_state()
         return old_state_hash
 
     def verify_login_state(self):
@@ -156,7 +375,7 @@ class IntelligentFuzzer:
             try:
                 # 현재 활성 윈도우 제목 가져오기
                 # Discord는 로그인 전에는 "Discord", 로그인 후에는 "친구 - Discord" 또는 "채널명 - Discord"로 바뀜
-                win_title = subprocess.check_output(["xdotool", "getactivewindow", "getwindowname"], stderr=subprocess.DEVNULL).decode().strip()
+                win_title = subprocess.check_output(["xdotool", "getactivewindow", "getwindowname"], stderr=subprocess.DEVNULL, **spawn_kwargs("xdotool")).decode().strip()
                 print(f"[DEBUG] Current Window Title: {win_title}", file=sys.stderr)
                 
                 # 로그인 화면의 특징이 보이면 실패
@@ -170,7 +389,7 @@ class IntelligentFuzzer:
                     
                     # [조건] "Discord" 단독이 아니고, 다른 단어가 포함되어 있으면 성공으로 간주
                     if len(win_title) > 7 and win_title != "Discord":
-                         self.logger.info(f"[Check] Login Verified by Title: {win_title}")
+                         self.logger.info("[Check] Login Verified by Title: %s", win_title)
                          return True
 
                 # [Backup] UI 요소 검색 (Login 버튼이 없는지 확인)
@@ -199,46 +418,67 @@ class IntelligentFuzzer:
         """
         # 1. 탐험 (Epsilon)
         if random.random() < self.epsilon:
-            return random.choice(list(self.q_values.keys()))
+            return random.choice(self.action_names)
         
         # 2. 활용 (Exploitation with Fatigue Penalty)
-        candidates = []
-        for action, q_val in self.q_values.items():
-            # [Logic] 같은 행동을 많이 할수록 가중치(Effective Q)를 깎음
-            # 예: hotkey_print를 10번 했으면 -5점 패널티
-            penalty = self.action_counts[action] * 0.5
-            
-            # 연속으로 같은 걸 하려 하면 패널티 2배
-            if action == self.last_action:
-                penalty += (self.consecutive_repeats * 2.0)
-                
-            effective_q = q_val - penalty
-            candidates.append((action, effective_q))
+        last_idx = self.action_index.get(self.last_action, -1)
+        best_idx, runner_idx = self._top_actions()
+        best_q = self._effective_q(best_idx)
         
-        # 점수 높은 순 정렬
-        candidates.sort(key=lambda x: x[1], reverse=True)
+        # 연속으로 같은 걸 하려 하면 추가 패널티 -> 1등이 직전 행동일 때만 2등과 비교하면 충분
+        if best_idx == last_idx and self.consecutive_repeats:
+            best_q -= self.consecutive_repeats * 2.0
+            if runner_idx >= 0:
+                runner_q = self._effective_q(runner_idx)
+                # 동점이면 먼저 등록된 행동 우선 (기존 안정 정렬과 동일)
+                if runner_q > best_q or (runner_q == best_q and runner_idx < best_idx):
+                    best_idx, best_q = runner_idx, runner_q
         
-        best_action = candidates[0][0]
-        best_q = candidates[0][1]
+        best_action = self.action_names[best_idx]
         
-        self.logger.info(f"[RL-Select] Best: {best_action} (Eff-Q: {best_q:.1f})")
+        self.logger.info("[RL-Select] Best: %s (Eff-Q: %.1f)", best_action, best_q)
         return best_action
 
+    def _effective_q(self, idx):
+        # [Logic] 같은 행동을 많이 할수록 가중치(Effective Q)를 깎음
+        # 예: hotkey_print를 10번 했으면 -5점 패널티
+        return self.q_table[idx] - self.action_counts[idx] * 0.5
+
+    def _top_actions(self):
+        """피로도 반영 Q 기준 상위 2개 행동 인덱스. update_q_table에서 필요할 때만 무효화됩니다."""
+        if self._top2 is None:
+            best = runner = -1
+            best_q = runner_q = float("-inf")
+            for idx in range(len(self.q_table)):
+                eff = self._effective_q(idx)
+                if eff > best_q:
+                    runner, runner_q = best, best_q
+                    best, best_q = idx, eff
+                elif eff > runner_q:
+                    runner, runner_q = idx, eff
+            self._top2 = (best, runner)
+        return self._top2
+
     def update_q_table(self, reward, action_success=True):
         if not self.last_action: return
+        idx = self.action_index[self.last_action]
         
         # 행동 카운트 갱신
-        self.action_counts[self.last_action] += 1
+        self.action_counts[idx] += 1
         
         # [Logic] 행동 수행 실패(예: 클릭할 게 없음) 시 큰 패널티
         if not action_success:
             reward -= 5.0
         
-        old_q = self.q_values.get(self.last_action, 0.0)
-        new_q = old_q + self.alpha * reward
-        self.q_values[self.last_action] = new_q
+        self.q_table[idx] += self.alpha * reward
+        new_q = self.q_table[idx]
         
-        self.logger.info(f"[RL-Learn] {self.last_action} -> R:{reward:.1f} / Q:{new_q:.1f} (Count: {self.action_counts[self.last_action]})")
+        # 한 틱에 바뀌는 건 이 행동 하나뿐 -> 상위 2개 순위에 영향을 줄 때만 캐시 무효화
+        top = self._top2
+        if top and (idx in top or self._effective_q(idx) >= self._effective_q(top[1])):
+            self._top2 = None
+        
+        self.logger.info("[RL-Learn] %s -> R:%.1f / Q:%.1f (Count: %d)", self.last_action, reward, new_q, self.action_counts[idx])
 
     def perform_action(self, action_name):
         success = False
@@ -271,24 +511,29 @@ class IntelligentFuzzer:
         return success
 
     def start(self):
+        # dpkg 분석은 UI 연결과 무관하므로 connect() 대기와 겹쳐서 수행
+        print("[DEBUG] start: Learning dpkg...", file=sys.stderr)
+        kb_thread = threading.Thread(target=self._learn_from_dpkg, daemon=True)
+        kb_thread.start()
+
         if not self.connect(): return
         if not self.verify_login_state():
             self.logger.error("[-] ABORTING: Target app is not in logged-in state.")
             return
 
         self.running = True
-        print("[DEBUG] start: Learning dpkg...", file=sys.stderr)
-        self._learn_from_dpkg()
         
         # 초기화
-        self.actions.xdo(["key", "ctrl+l"]) # xdo도 라이브러리 통해 호출 권장
-        time.sleep(0.5)
-        self.actions.xdo(["type", "data:text/html,<h1>Target-Driven AI</h1>"])
-        self.actions.xdo(["key", "Return"])
+        self.actions.xdo(["key", "ctrl+l"], ["sleep", "0.5"], # xdo도 라이브러리 통해 호출 권장
+                         ["type", "--args", "1", "data:text/html,<h1>Target-Driven AI</h1>"],
+                         ["key", "Return"])
         time.sleep(2)
 
+        # KB는 메인 루프에서부터 사용됨
+        kb_thread.join()
+
         self.last_score = self.feedback.get_artifact_count()
-        self.logger.info(f"[Init] Score Synced: {self.last_score}")
+        self.logger.info("[Init] Score Synced: %s", self.last_score)
 
         print("[DEBUG] start: Initializing loop...", file=sys.stderr)
         start_time = time.time()
@@ -305,13 +550,13 @@ class IntelligentFuzzer:
 
             # 1. 상태 보상
             current_state = self.get_current_ui_state()
-            self.state_visits[current_state] += 1
-            visit_count = self.state_visits[current_state]
+            visit_count = self.visit_state(current_state)
             
             state_reward = 0.0
             if current_state != "STATE_UNKNOWN":
                 if visit_count == 1:
-                    self.logger.info(f"[!!!] NEW STATE: {current_state}")
+                    self.states_discovered += 1
+                    self.logger.info("[!!!] NEW STATE: %s", current_state)
                     state_reward = 50.0
                 else:
                     state_reward = -1.0 # 방문할수록 매력 감소
@@ -323,7 +568,7 @@ class IntelligentFuzzer:
             
             artifact_reward = 0.0
             if delta > 0:
-                self.logger.info(f"[!!!] REWARD: +{delta}")
+                self.logger.info("[!!!] REWARD: +%s", delta)
                 artifact_reward = delta * 10.0
             
             # [Logic] 내적 동기 (Intrinsic Motivation)
@@ -349,11 +594,15 @@ class IntelligentFuzzer:
             self.last_action = action
             
             print("[DEBUG] start: Action performed. Waiting...", file=sys.stderr)
-            time.sleep(0.5)
-            
-            self.logger.info(f"[Stats] States: {len(self.state_visits)} | Nodes: {len(self.interacted_elements)}")
+            self.logger.info("[Stats] States: %d | Nodes: %d", self.states_discovered, len(self.interacted_elements))
             
-            current_state = self.wait_for_state_change(current_state, timeout=2.0)
+            # 고정 대기 대신 적응형 대기: 창 제목 변화나 아티팩트 push가 오면 즉시 깨어남
+            new_state = self.wait_for_state_change(current_state, timeout=self.settle_timeout)
+            if new_state != current_state or delta > 0:
+                self.settle_timeout = self.SETTLE_MIN
+            else:
+                self.settle_timeout = min(self.SETTLE_MAX, self.settle_timeout * 2)
+            current_state = new_state
 
 if __name__ == "__main__":
     import sys
@@ -367,4 +616,5 @@ if __name__ == "__main__":
     if len(sys.argv) > 3: config_path = sys.argv[3]
     
     fuzzer = IntelligentFuzzer(app, duration=dur, config_path=config_path)
-    fuzzer.start()
\ No newline at end of file
+    try: fuzzer.start()
+    finally: fuzzer.actions.close()
\ No newline at end of file
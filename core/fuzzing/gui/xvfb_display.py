@@ -1,8 +1,11 @@
 import os
 import time
+import shutil
 import subprocess
 from typing import Optional
 
+from core.fuzzing.spawn import spawn_kwargs
+
 class XvfbDisplay:
     def __init__(self, display_id: int = 99, res: str = "1920x1080x24"):
         self.display_id = f":{display_id}"
@@ -10,6 +13,40 @@ class XvfbDisplay:
         self.xvfb_proc: Optional[subprocess.Popen] = None
         self.fluxbox_proc: Optional[subprocess.Popen] = None
         self.auth_file = f"/tmp/.Xauthority_xvfb_{display_id}"
+        self.x_socket = f"/tmp/.X11-unix/X{display_id}"
+
+    @staticmethod
+    def _wait_ready(predicate, timeout, interval=0.01, max_interval=0.2):
+        """
+        predicate()가 참이 될 때까지 재확인. 제한 시간 내 준비되면 True.
+        빠른 환경에서는 곧바로 통과하고, 느린 환경에서는 간격을 2배씩 늘려 프로브 프로세스 남발을 막음
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if predicate(): return True
+            time.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+            interval = min(interval * 2, max_interval)
+        return predicate()
+
+    def _x_ready(self):
+        # 소켓 생성 -> 실제 접속 가능 여부 순으로 확인 (xdpyinfo가 없으면 소켓만으로 판단)
+        if not os.path.exists(self.x_socket): return False
+        try:
+            return subprocess.run(["xdpyinfo", "-display", self.display_id], **spawn_kwargs("xdpyinfo"),
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=1).returncode == 0
+        except FileNotFoundError:
+            return True
+        except subprocess.TimeoutExpired:
+            return False
+
+    def _wm_ready(self):
+        # EWMH 윈도우 매니저는 루트 윈도우에 _NET_SUPPORTING_WM_CHECK를 설정함
+        try:
+            out = subprocess.run(["xprop", "-root", "_NET_SUPPORTING_WM_CHECK"], **spawn_kwargs("xprop"),
+                                 capture_output=True, timeout=1).stdout
+            return b"window id" in out
+        except subprocess.TimeoutExpired:
+            return False
 
     def __enter__(self):
         print(f"[*] Starting Xvfb + Fluxbox on {self.display_id}...")
@@ -29,20 +66,27 @@ class XvfbDisplay:
         # Start Xvfb
         self.xvfb_proc = subprocess.Popen(
             ["Xvfb", self.display_id, "-screen", "0", self.res, "-ac"],
+            **spawn_kwargs("Xvfb"),
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL
         )
-        time.sleep(1)
+        # 고정 1초 대기 대신 X 서버가 접속을 받을 때까지만 대기
+        if not self._wait_ready(self._x_ready, timeout=5):
+            print(f"[-] Warning: Xvfb on {self.display_id} not ready after 5s.")
 
         # Start Fluxbox
         try:
+            # DISPLAY/XAUTHORITY는 위에서 os.environ에 설정했으므로 env를 따로 넘기지 않고 상속
             self.fluxbox_proc = subprocess.Popen(
                 ["fluxbox"],
+                **spawn_kwargs("fluxbox"),
                 stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                env=os.environ
+                stderr=subprocess.DEVNULL
             )
-            time.sleep(1)
+            if shutil.which("xprop"):
+                self._wait_ready(self._wm_ready, timeout=5)
+            else:
+                time.sleep(1)
         except FileNotFoundError:
             print("[-] Warning: Fluxbox not installed.")
             
@@ -1,4 +1,8 @@
+import os
+import mmap
 import socket
+import selectors
+import struct
 import threading
 import logging
 import time
@@ -6,6 +10,22 @@ import time
 HOST = '127.0.0.1'
 PORT = 13337
 
+# Push 프로토콜 레코드: 부호 있는 64bit 점수 (network byte order)
+SCORE_RECORD = struct.Struct("!q")
+
+# 같은 호스트의 퍼저가 점수를 메모리 읽기만으로 가져가도록 공유하는 카운터.
+# seqlock: [seq(8B) | score(8B)] 두 필드를 각각 따로 접근.
+# writer는 seq를 홀수로 올림 -> 점수 기록 -> seq를 짝수로 올림 순서로 세 번 나눠 쓰고,
+# reader는 seq 읽기 -> 점수 읽기 -> seq 재확인 순서로 세 번 나눠 읽어 쓰는 도중의 값을 걸러냄
+SHM_PATH = f"/dev/shm/fuzz_feedback_{PORT}"
+SHM_SEQ = struct.Struct("=Q")
+SHM_COUNT = struct.Struct("=q")
+SHM_SEQ_OFFSET = 0
+SHM_COUNT_OFFSET = 8
+SHM_SIZE = 16
+# 읽기 재시도 상한. 쓰기 중간에 오케스트레이터가 죽으면 seq가 홀수로 남으므로 무한 대기하지 않음
+SHM_READ_RETRIES = 256
+
 class FeedbackServer:
     """
     Runs inside the Orchestrator (Root).
@@ -15,13 +35,63 @@ class FeedbackServer:
         self.artifact_count = 0
         self.running = False
         self.server_sock = None
+        self.subscribers = []
         self.lock = threading.Lock()
+        self.shm = None
         self.logger = logging.getLogger("FeedbackServer")
 
+    def _open_shm(self):
+        """
+        포트를 차지한(bind 성공) 서버만 호출. root가 누구나 쓸 수 있는 /dev/shm에 만드는 파일이므로
+        새 임시 이름으로 O_EXCL|O_NOFOLLOW 생성(미리 심어 둔 링크를 따라가지 않음) 후 초기화하고 rename으로 교체
+        """
+        tmp_path = f"{SHM_PATH}.{os.getpid()}"
+        try:
+            fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o644)
+            try:
+                os.ftruncate(fd, SHM_SIZE)
+                self.shm = mmap.mmap(fd, SHM_SIZE)
+            finally:
+                os.close(fd)
+            SHM_COUNT.pack_into(self.shm, SHM_COUNT_OFFSET, self.artifact_count)
+            os.replace(tmp_path, SHM_PATH)
+        except OSError as e:
+            self.logger.warning(f"[-] Shared score counter unavailable, socket only: {e}")
+            if self.shm:
+                self.shm.close()
+                self.shm = None
+            try: os.unlink(tmp_path)
+            except OSError: pass
+
+    def _write_shm(self, count):
+        # 필드마다 별도 저장: 점수는 seq가 홀수인 동안에만 바뀜 (writer는 lock으로 하나뿐)
+        shm = self.shm
+        (seq,) = SHM_SEQ.unpack_from(shm, SHM_SEQ_OFFSET)
+        SHM_SEQ.pack_into(shm, SHM_SEQ_OFFSET, seq + 1)
+        SHM_COUNT.pack_into(shm, SHM_COUNT_OFFSET, count)
+        SHM_SEQ.pack_into(shm, SHM_SEQ_OFFSET, seq + 2)
+
     def update_count(self, count):
         """Call this from the Orchestrator loop to update the score."""
         with self.lock:
             self.artifact_count = count
+            if self.shm:
+                self._write_shm(count)
+            # 구독 소켓은 값 전달 겸 "바뀌었음" 알림(wakeup) 용도
+            record = SCORE_RECORD.pack(count)
+            for client in list(self.subscribers):
+                self._push(client, record)
+
+    def _push(self, client, record):
+        """구독자에게 점수 레코드를 non-blocking으로 전송 (lock 보유 상태에서 호출)"""
+        try:
+            if client.send(record) == len(record):
+                return
+        except OSError:
+            pass
+        # 버퍼가 가득 찼거나 끊긴 구독자는 정리 (레코드 경계가 깨지지 않도록)
+        self.subscribers.remove(client)
+        client.close()
 
     def start(self):
         self.running = True
@@ -41,6 +111,8 @@ class FeedbackServer:
         if not bind_success:
             self.logger.error("[-] IPC Bind Failed after retries.")
             return
+        # 공유 카운터는 포트를 얻은 뒤에 생성 (다른 오케스트레이터가 쓰는 카운터를 덮어쓰거나 지우지 않도록)
+        self._open_shm()
         
         try:
             self.server_sock.listen(1)
@@ -53,21 +125,64 @@ class FeedbackServer:
             self.logger.error(f"[-] IPC Bind Failed: {e}")
 
     def _listen_loop(self):
+        # 요청 수신 대기 중인 클라이언트가 다른 연결의 accept를 막지 않도록 selector로 다중화
+        sel = selectors.DefaultSelector()
+        self.server_sock.setblocking(False)
+        sel.register(self.server_sock, selectors.EVENT_READ)
         while self.running:
+            try:
+                ready = sel.select(timeout=0.5) # stop() 확인 주기
+            except OSError:
+                break
+            for key, _ in ready:
+                if key.fileobj is self.server_sock:
+                    self._accept_pending(sel)
+                else:
+                    sel.unregister(key.fileobj)
+                    self._handle_request(key.fileobj)
+        sel.close()
+
+    def _accept_pending(self, sel):
+        # 한 번 깨어났을 때 대기 중인 연결을 모두 수락
+        while True:
             try:
                 client, _ = self.server_sock.accept()
-                with client:
-                    # Simple Protocol: Client sends "GET", Server sends Count
-                    data = client.recv(1024)
-                    if data.strip() == b"GET":
-                        with self.lock:
-                            resp = str(self.artifact_count).encode()
-                        client.sendall(resp)
-            except:
-                pass
+            except OSError: # BlockingIOError 포함
+                return
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client.setblocking(False)
+            sel.register(client, selectors.EVENT_READ)
+
+    def _handle_request(self, client):
+        # Protocol:
+        #   "SUB" -> 연결을 유지하고 점수가 바뀔 때마다 8바이트 레코드를 push
+        #   "GET" -> 현재 점수를 텍스트로 응답 후 종료 (legacy)
+        try:
+            data = client.recv(1024).strip()
+            if data == b"SUB":
+                with self.lock:
+                    self.subscribers.append(client)
+                    self._push(client, SCORE_RECORD.pack(self.artifact_count))
+                return
+            if data == b"GET":
+                with self.lock:
+                    resp = str(self.artifact_count).encode()
+                client.send(resp)
+        except OSError:
+            pass
+        client.close()
 
     def stop(self):
         self.running = False
+        with self.lock:
+            for client in self.subscribers:
+                client.close()
+            self.subscribers.clear()
+            if self.shm:
+                self.shm.close()
+                self.shm = None
+                try: os.unlink(SHM_PATH)
+                except OSError: pass
         if self.server_sock:
             self.server_sock.close()
 
@@ -75,14 +190,118 @@ class FeedbackClient:
     """
     Runs inside the Smart Fuzzer (User).
     Connects to the Orchestrator to get the current score.
+
+    백그라운드 스레드가 구독(SUB) 연결에서 서버가 push한 점수 레코드를 받아
+    latest에 기록합니다. get_artifact_count는 공유 카운터(SHM_PATH)가 있으면 그것을,
+    없으면 마지막 push 값을 읽기만 하고(IPC 왕복 없음), wait는 점수가 바뀌었다는 이벤트를 기다립니다.
     """
-    def get_artifact_count(self):
+    RECONNECT_DELAY = 1.0
+
+    def __init__(self):
+        self.sock = None
+        self.latest = 0
+        self.changed = threading.Event()
+        self._reader = None
+        self.shm = None
+
+    def _attach_shm(self):
+        try:
+            fd = os.open(SHM_PATH, os.O_RDONLY)
+            try:
+                self.shm = mmap.mmap(fd, SHM_SIZE, prot=mmap.PROT_READ)
+            finally:
+                os.close(fd)
+        except (OSError, ValueError):
+            self.shm = None
+
+    @staticmethod
+    def _read_shm(shm):
+        # seqlock 읽기: seq -> 점수 -> seq를 각각 따로 읽고,
+        # 쓰는 도중(홀수)이었거나 읽는 사이 seq가 바뀌었으면 점수가 찢어졌을 수 있으므로 재시도.
+        # SHM_READ_RETRIES번 안에 일관된 값을 못 읽으면 None (writer가 쓰는 도중 죽은 경우)
+        for _ in range(SHM_READ_RETRIES):
+            (seq,) = SHM_SEQ.unpack_from(shm, SHM_SEQ_OFFSET)
+            if seq % 2:
+                continue
+            (count,) = SHM_COUNT.unpack_from(shm, SHM_COUNT_OFFSET)
+            if SHM_SEQ.unpack_from(shm, SHM_SEQ_OFFSET)[0] == seq:
+                return count
+        return None
+
+    def _subscribe(self):
+        s = None
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(0.5) # Fast timeout
-                s.connect((HOST, PORT))
-                s.sendall(b"GET")
-                data = s.recv(1024)
-                return int(data.decode())
-        except:
-            return 0
\ No newline at end of file
+            s = socket.create_connection((HOST, PORT), timeout=0.5) # Fast timeout
+            s.sendall(b"SUB")
+            # 서버는 구독 직후 현재 점수를 보내므로 첫 레코드는 동기적으로 수신
+            initial = b""
+            while len(initial) < SCORE_RECORD.size:
+                chunk = s.recv(SCORE_RECORD.size - len(initial))
+                if not chunk: raise OSError("feedback server closed")
+                initial += chunk
+            (self.latest,) = SCORE_RECORD.unpack(initial)
+            s.settimeout(None) # 이후 수신은 리더 스레드에서 blocking으로
+            self.sock = s
+            # 서버가 떠 있으면 공유 카운터도 준비되어 있음 (재시작 시 새 파일이므로 다시 매핑)
+            self._attach_shm()
+            return True
+        except OSError:
+            if s: s.close()
+            return False
+
+    def _close(self):
+        if self.sock:
+            self.sock.close()
+        self.sock = None
+
+    def _reader_loop(self):
+        size = SCORE_RECORD.size
+        buf = b""
+        while True:
+            if self.sock is None:
+                if not self._subscribe():
+                    time.sleep(self.RECONNECT_DELAY)
+                    continue
+                buf = b""
+                self.changed.set()
+            try:
+                data = self.sock.recv(4096)
+            except OSError:
+                data = b""
+            if not data:
+                self._close()
+                continue
+
+            # 쌓인 레코드 중 마지막(최신) 값만 취함
+            buf += data
+            usable = len(buf) - len(buf) % size
+            if usable:
+                (self.latest,) = SCORE_RECORD.unpack_from(buf, usable - size)
+                buf = buf[usable:]
+                self.changed.set()
+
+    def _ensure_reader(self):
+        if self._reader is None:
+            # 첫 구독은 호출 스레드에서 시도 -> 첫 호출부터 실제 점수를 기준값으로 사용
+            self._subscribe()
+            self._reader = threading.Thread(target=self._reader_loop, daemon=True)
+            self._reader.start()
+
+    def wait(self, timeout):
+        """점수 변화가 push되거나 timeout이 지날 때까지 대기. 도착 시 True."""
+        self._ensure_reader()
+        fired = self.changed.wait(timeout)
+        self.changed.clear()
+        return fired
+
+    def get_artifact_count(self):
+        self._ensure_reader()
+        shm = self.shm
+        if shm is not None:
+            count = self._read_shm(shm)
+            if count is not None:
+                return count
+            # 공유 카운터가 쓰기 도중 상태로 멈춤 -> 떼어내고 이후로는 push 받은 값 사용
+            self.shm = None
+            shm.close()
+        return self.latest
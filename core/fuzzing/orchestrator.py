@@ -1,21 +1,228 @@
 import os
+import re
 import time
 import json
+import gzip
 import signal
 import logging
 import subprocess
 import shutil
 import sys
+import bisect
+import glob
+from array import array
+import selectors
+import mmap
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional, Set, Any
 
 from core.tracer.ebpf_engine import EBPFTracer
 from core.fuzzing.gui.xvfb_display import XvfbDisplay
 from core.metadata.extractor import MetadataExtractor
 from core.fuzzing.ipc import FeedbackServer
+from core.fuzzing.spawn import resolve_executable, spawn_kwargs
+
+try:
+    import orjson # 선택 의존성: 있으면 보고서 직렬화/설정 파싱에 사용
+except ImportError:
+    orjson = None
+
+def _dumps(obj) -> bytes:
+    """보고서 항목 한 개를 한 줄 UTF-8 JSON 바이트로 직렬화 (직렬화 불가 값은 str로)"""
+    if orjson:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=str, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+# {(경로, mtime_ns, 크기): 파싱 결과} - 같은 프로세스에서 여러 세션을 만들 때 설정 파일을 다시 읽지 않음
+_JSON_CACHE: Dict[tuple, Any] = {}
+
+def _load_json_cached(path):
+    """JSON 파일을 읽어 파싱하되, 파일이 바뀌지 않았으면 이전 결과를 반환 (반환값은 읽기 전용으로 취급)"""
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    if key in _JSON_CACHE:
+        return _JSON_CACHE[key]
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = _JSON_CACHE[key] = orjson.loads(raw) if orjson else json.loads(raw)
+    return data
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("Orchestrator")
 
+# 루프 한 바퀴에서 tracer로부터 꺼내 처리할 최대 이벤트 수
+TRACER_BATCH = 1024
+# SIGTERM 후 SIGKILL로 넘어가기까지 기다리는 시간(초)
+KILL_GRACE = 0.5
+# 타겟은 종료 중 프로필/세션/캐시를 디스크에 기록하므로(=수집 대상 아티팩트) 더 길게 기다림
+TARGET_KILL_GRACE = 5.0
+# 크래시 후 타겟 재실행 간격(초). 실행 후 CHILD_STABLE_TIME 안에 다시 죽으면 간격을 2배씩(최대값까지) 늘림
+TARGET_RESTART_DELAY = 2.0
+TARGET_RESTART_MAX_DELAY = 60.0
+CHILD_STABLE_TIME = 30.0
+# 퍼저만 죽었을 때의 재시작 간격(초). 최소 1초 (예전 1초 점검 주기와 같은 속도 제한), 반복되면 2배씩
+FUZZER_RESTART_DELAY = 1.0
+FUZZER_RESTART_MAX_DELAY = 30.0
+# 퍼저 로그 줄 맨 앞의 asctime(초 단위) - 시/분/초를 따로 잡아 strptime 없이 epoch 계산
+# 로그는 바이너리(mmap)로 읽으므로 bytes 패턴 (int()는 bytes 숫자도 그대로 변환)
+LOG_TS_RE = re.compile(rb'(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})')
+ACTION_MARKER = b"[Action]"
+
+def _log_timestamp(match, hour_epochs):
+    """LOG_TS_RE 매치를 로컬 시각 epoch로 변환. 시(hour) 단위 기준값을 캐시해 mktime은 시간당 한 번"""
+    y, mo, d, h, mi, sec = map(int, match.groups())
+    key = (y, mo, d, h)
+    base = hour_epochs.get(key)
+    if base is None:
+        base = hour_epochs[key] = time.mktime((y, mo, d, h, 0, 0, 0, 0, -1))
+    return base + mi * 60 + sec
+
+# 앱 이름(소문자)에 포함되면 Electron/Chromium 계열로 보고 공통 플래그를 붙임
+ELECTRON_APP_KEYWORDS = ("chrome", "code", "discord", "electron")
+# 아직 계산하지 않은 값 표시용 (None도 유효한 결과라 별도 표식 사용)
+_UNSET = object()
+def _file_stamp(path):
+    """파일 내용이 바뀌었는지 판단하는 (mtime_ns, 크기). 없거나 접근 불가면 None"""
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _mask_ids(mask):
+    """비트마스크에 켜진 비트 번호(=ID)를 작은 것부터 반환"""
+    ids = []
+    while mask:
+        low = mask & -mask
+        ids.append(low.bit_length() - 1)
+        mask ^= low
+    return ids
+
+# 퍼저에 점수를 알리는 IPC 갱신의 최소 간격(초). 그 사이의 갱신은 합쳐서 한 번만 전송
+IPC_MIN_INTERVAL = 0.1
+# 타겟 규칙(min_size/content_key) 검사용 메타데이터 캐시 크기 (LRU)
+META_CACHE_SIZE = 4096
+# 보고서 작성 시 메타데이터 추출(stat/libmagic/해시 등 I/O 위주)에 쓰는 스레드 수
+EXTRACT_WORKERS = 16
+# 타겟 실행 후 창이 뜰 때까지 기다리는 최대 시간(초)과 확인 간격. 창이 보이면 바로 다음 단계로
+TARGET_READY_TIMEOUT = 5.0
+TARGET_READY_POLL = 0.1
+# 바이너리 소유 패키지 조회: dpkg 파일 목록을 직접 읽고, 결과는 dpkg 상태 파일 mtime 기준으로 디스크에 캐시
+DPKG_INFO_DIR = "/var/lib/dpkg/info"
+DPKG_STATUS_PATH = "/var/lib/dpkg/status"
+DPKG_OWNER_CACHE = os.path.expanduser("~/.cache/fuzzing/dpkg_owner.json")
+
+class SpawnedProcess:
+    """
+    os.posix_spawn(setsid=True)로 띄운 자식 프로세스의 최소 Popen 호환 래퍼.
+    subprocess.Popen은 새 세션(preexec_fn/start_new_session)을 요청하면 posix_spawn 대신
+    fork+exec 경로를 타므로, 큰 오케스트레이터(bcc/LLVM 적재)의 페이지 테이블 복사를 피하려고 직접 사용.
+    """
+    def __init__(self, cmd, env=None):
+        path = resolve_executable(cmd[0])
+        file_actions = [(os.POSIX_SPAWN_OPEN, fd, os.devnull, os.O_WRONLY, 0) for fd in (1, 2)]
+        self.args = cmd
+        self.pid = os.posix_spawn(path, cmd, os.environ if env is None else env,
+                                  file_actions=file_actions, setsid=True)
+        self.returncode = None
+
+    def _reap(self, flags):
+        try:
+            pid, status = os.waitpid(self.pid, flags)
+        except ChildProcessError:
+            return
+        if pid:
+            self.returncode = os.waitstatus_to_exitcode(status)
+
+    def poll(self):
+        if self.returncode is None:
+            self._reap(os.WNOHANG)
+        return self.returncode
+
+    def wait(self, timeout=None):
+        if timeout is None:
+            if self.returncode is None:
+                self._reap(0)
+            return self.returncode
+        deadline = time.monotonic() + timeout
+        while self.poll() is None:
+            if time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(self.args, timeout)
+            time.sleep(0.01)
+        return self.returncode
+
+    def send_signal(self, sig):
+        if self.poll() is None:
+            os.kill(self.pid, sig)
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+class ChildWatcher:
+    """
+    자식 프로세스마다 pidfd(os.pidfd_open)를 selector에 등록해, 종료되는 순간 select가 깨어나게 합니다.
+    SIGCHLD 핸들러가 필요 없고 어느 스레드에서도 동작하며, 어떤 자식이 끝났는지 바로 알 수 있음.
+    pidfd를 쓸 수 없으면(커널 5.3 미만 등) active=False가 되고 호출 측이 주기적으로 poll()
+    """
+    def __init__(self, sel):
+        self.sel = sel
+        self.active = hasattr(os, "pidfd_open")
+        self._fds = {} # 역할("target"/"fuzzer") -> pidfd
+
+    def watch(self, role, proc):
+        """role의 감시 대상을 proc으로 교체 (proc이 None이면 감시 해제)"""
+        self.unwatch(role)
+        if not self.active or proc is None:
+            return
+        try:
+            fd = os.pidfd_open(proc.pid)
+        except OSError as e:
+            logger.warning(f"[-] pidfd unavailable ({e}), falling back to periodic child checks")
+            self.close()
+            self.active = False
+            return
+        self.sel.register(fd, selectors.EVENT_READ, role)
+        self._fds[role] = fd
+
+    def unwatch(self, role):
+        fd = self._fds.pop(role, None)
+        if fd is not None:
+            self.sel.unregister(fd)
+            os.close(fd)
+
+    def close(self):
+        for role in list(self._fds):
+            self.unwatch(role)
+
+class RestartBackoff:
+    """
+    죽은 자식을 언제 다시 띄울지 정합니다. 실행 직후 계속 죽는 자식(프로필 잠금, 기존 인스턴스에 위임 등)을
+    빈틈없이 재실행하지 않도록, 실행 시각부터 delay가 지나야 재시작하고 짧게 살다 죽을 때마다 delay를 2배로 늘림.
+    stable_after초 이상 살아 있었으면 delay를 처음 값으로 되돌림
+    """
+    def __init__(self, min_delay, max_delay, stable_after=CHILD_STABLE_TIME):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.stable_after = stable_after
+        self.delay = min_delay
+        self.started = time.monotonic()
+
+    def mark_started(self):
+        self.started = time.monotonic()
+
+    def on_exit(self):
+        """자식 종료를 기록하고 재시작해도 되는 시각(monotonic)을 반환"""
+        now = time.monotonic()
+        if now - self.started >= self.stable_after:
+            self.delay = self.min_delay
+        due = max(now, self.started + self.delay)
+        self.delay = min(self.delay * 2, self.max_delay)
+        return due
+
 class ArtifactDiscoverySession:
     def __init__(self, 
                  target_cmd: List[str], 
@@ -44,6 +251,9 @@ class ArtifactDiscoverySession:
         # 타겟 로드
         self.targets_config: List[Any] = []
         self.found_targets: Set[str] = set()
+        # 미리 컴파일한 타겟 규칙: 경로 부분문자열 전체의 정규식 합집합 + 규칙별 (경로, min_size, content_key)
+        self._target_re = None
+        self._target_rules: List[tuple] = []
         if target_state_file:
             self._load_target_state(target_state_file)
 
@@ -63,7 +273,35 @@ class ArtifactDiscoverySession:
         self.ipc_server = FeedbackServer()
         self.proc: Optional[subprocess.Popen] = None
         self.fuzzer_proc: Optional[subprocess.Popen] = None
-        self.all_events = []
+        # {filepath: [first_seen, syscall 비트마스크, 프로세스 비트마스크]} - 드레인할 때마다 즉시 집계
+        # (파일마다 set 두 개를 두지 않고 tracer가 부여한 정수 ID를 비트로 기록)
+        self.unique_artifacts: Dict[str, List[Any]] = {}
+        # {filepath: ((mtime_ns, 크기) 또는 None, 포렌식 기본 점수)} - 파일 상태가 그대로인 반복 이벤트는 다시 채점하지 않음
+        self._score_cache: Dict[str, tuple] = {}
+        # 삭제/이름 변경 이벤트의 tracer type ID: 해당 경로의 캐시 점수는 버리고 다음 이벤트에서 다시 채점
+        # (Chrome 등이 대량으로 만들고 지우는 임시 파일이 캐시에 계속 쌓이지 않도록 함)
+        self._invalidating_types = frozenset(
+            type_id for type_id, name in self.tracer.event_types.items() if name in ("DELETE", "RENAME"))
+        # {(filepath, mtime_ns, size): metadata} - 파일이 그대로면 타겟 규칙 검사 때 다시 추출하지 않음
+        self._meta_cache: "OrderedDict[tuple, Any]" = OrderedDict()
+        # IPC 갱신 합치기: 마지막 전송 시각과 아직 보내지 못한 점수
+        self._last_ipc = 0.0
+        self._ipc_pending: Optional[float] = None
+
+        # [Robustness] Pass unique log path to fuzzer
+        self.fuzzer_log_path = os.path.join(self.output_dir, "fuzzer_debug.log")
+        # 퍼저 프로세스의 stdout/stderr
+        self.fuzzer_output_path = os.path.join(self.output_dir, "fuzzer_output.log")
+        # 자식 프로세스(at-spi/타겟/퍼저)가 공유하는 환경변수. 세션당 한 번만 구성
+        self._child_env = {
+            **os.environ,
+            "GTK_MODULES": "gail:atk-bridge",
+            "NO_AT_BRIDGE": "0",
+            "PYTHONPATH": os.getcwd(),
+            "FUZZER_LOG_PATH": self.fuzzer_log_path,
+        }
+        # 타겟 실행 명령어 (재실행마다 다시 만들지 않음)
+        self._target_cmd: List[str] = self._build_target_cmd()
 
     def _load_or_generate_config(self, path, app_name) -> Dict:
         """
@@ -72,8 +310,7 @@ class ArtifactDiscoverySession:
         # 1. 기존 설정 파일 확인
         try:
             if os.path.exists(path):
-                with open(path, 'r') as f:
-                    full_config = json.load(f)
+                full_config = _load_json_cached(path)
                 normalized_name = app_name.lower().replace(" ", "-")
                 for key, cfg in full_config.items():
                     if key in normalized_name:
@@ -96,11 +333,14 @@ class ArtifactDiscoverySession:
             return {}
 
         # B. 패키지명 찾기 (dpkg)
-        package_name = app_name.lower()
-        try:
-            out = subprocess.check_output(["dpkg", "-S", binary_path], stderr=subprocess.DEVNULL).decode()
-            package_name = out.split(":")[0].strip()
-        except: pass
+        package_name = self._dpkg_owner(binary_path)
+        if not package_name:
+            package_name = app_name.lower()
+            try:
+                # 출력 전체를 디코딩/분할하지 않고 첫 ':' 앞(패키지명)만 취함
+                out = subprocess.check_output(["dpkg", "-S", binary_path], stderr=subprocess.DEVNULL)
+                package_name = out.partition(b":")[0].decode("ascii", "ignore").strip() or package_name
+            except: pass
 
         # C. 기본 핫키 설정 (표준 단축키)
         default_actions = {
@@ -123,13 +363,71 @@ class ArtifactDiscoverySession:
         logger.info(f"[Config] Auto-generated profile: {generated_config}")
         return generated_config
 
+    def _dpkg_owner(self, binary_path):
+        """
+        binary_path를 설치한 패키지명을 dpkg -S 프로세스 없이 찾습니다.
+        찾은 결과는 dpkg 상태가 바뀌기 전까지(status mtime) 디스크 캐시에서 바로 반환하고,
+        dpkg 정보를 읽을 수 없으면 None (호출 측이 dpkg -S로 대체)
+        """
+        try:
+            stamp = os.stat(DPKG_STATUS_PATH).st_mtime_ns
+        except OSError:
+            return None
+
+        owners = {}
+        try:
+            with open(DPKG_OWNER_CACHE, 'r') as f:
+                cached = json.load(f)
+            if cached.get("status_mtime_ns") == stamp:
+                owners = cached.get("owners", {})
+        except: pass
+        if binary_path in owners:
+            return owners[binary_path]
+
+        # 각 .list 파일은 패키지가 설치한 경로를 한 줄에 하나씩 담고 있음 (첫 줄은 "/.")
+        needle = b"\n" + os.fsencode(binary_path) + b"\n"
+        package_name = None
+        for list_path in glob.glob(os.path.join(DPKG_INFO_DIR, "*.list")):
+            try:
+                with open(list_path, 'rb') as f:
+                    if needle in f.read():
+                        # "pkg:arch.list" 형식의 multi-arch 이름은 dpkg -S처럼 패키지명만 사용
+                        package_name = os.path.basename(list_path)[:-5].split(":")[0]
+                        break
+            except OSError: continue
+        if package_name is None:
+            return None
+
+        owners[binary_path] = package_name
+        try:
+            os.makedirs(os.path.dirname(DPKG_OWNER_CACHE), exist_ok=True)
+            with open(DPKG_OWNER_CACHE, 'w') as f:
+                json.dump({"status_mtime_ns": stamp, "owners": owners}, f)
+        except OSError: pass
+        return package_name
+
     def _load_target_state(self, path):
         try:
-            with open(path, 'r') as f:
-                self.targets_config = json.load(f)
+            self.targets_config = _load_json_cached(path)
             logger.info(f"[Target-Mode] Loaded {len(self.targets_config)} target rules.")
         except Exception:
             self.targets_config = []
+        self._compile_target_rules()
+
+    def _compile_target_rules(self):
+        """타겟 규칙을 한 번만 해석해 이벤트마다 isinstance/.get/부분문자열 검사를 반복하지 않도록 함"""
+        rules = []
+        for target in self.targets_config:
+            if isinstance(target, str):
+                rules.append((target, None, None))
+            elif isinstance(target, dict):
+                target_path = target.get('path') or target.get('path_pattern')
+                if target_path:
+                    rules.append((target_path, target.get('min_size'), target.get('content_key')))
+        self._target_rules = rules
+        # 대부분의 이벤트는 어떤 타겟과도 맞지 않으므로 C 정규식 검색 한 번으로 걸러냄
+        paths = dict.fromkeys(r[0] for r in rules)
+        self._target_re = re.compile("|".join(map(re.escape, paths))) if paths else None
 
     def _setup_inputs(self):
         logger.info(f"[Phase 0] Using Persistent Profile at: {self.chrome_user_dir}")
@@ -140,49 +438,73 @@ class ArtifactDiscoverySession:
         else:
             logger.info("Resuming with existing profile data.")
 
-    def calculate_reward(self, new_events):
+    def calculate_reward(self, filepaths):
+        # 기본 점수는 내용에 따라 달라지므로 배치 내 경로마다 stat 한 번으로 (mtime, 크기)를 확인해
+        # 처음 보거나 상태가 바뀐 경로만 배치로 다시 계산하고 나머지는 캐시 조회
+        # (같은 프로필 파일이 수백 번 반복해서 열리므로 대부분 캐시 적중.
+        #  openat 시점에 아직 없던 새 파일도 이후 이벤트에서 실제 내용으로 다시 채점됨)
+        cache = self._score_cache
+        stale = {}
+        for p in dict.fromkeys(filepaths):
+            stamp = _file_stamp(p)
+            cached = cache.get(p)
+            if cached is None or cached[0] != stamp:
+                stale[p] = stamp
+        if stale:
+            for p, score in zip(stale, self.extractor.calculate_forensic_score_batch(list(stale))):
+                cache[p] = (stale[p], score)
+        base_scores = [cache[p][1] for p in filepaths]
+        if not self.targets_config:
+            return int(sum(base_scores))
+
         total_score = 0.0
-        for event in new_events:
-            fpath = event['filename']
-            base_score = self.extractor.calculate_forensic_score(fpath)
-            
-            target_bonus = 0.0
-            if self.targets_config:
-                meta = self.extractor.extract(fpath)
-                for target in self.targets_config:
-                    target_path = None
-                    if isinstance(target, str): target_path = target
-                    elif isinstance(target, dict): target_path = target.get('path') or target.get('path_pattern')
-                    
-                    if not target_path: continue
-                    if target_path not in fpath: continue
-                        
-                    if isinstance(target, dict):
-                        if 'min_size' in target:
-                            if not meta or meta['size'] < target['min_size']: continue
-                        if 'content_key' in target:
-                            if not meta: continue
-                            if target['content_key'] not in str(meta.get('content_summary', {})): continue
-
-                    target_bonus = 500.0
-                    if fpath not in self.found_targets:
-                        logger.info(f"[★ PRECISE MATCH] {fpath} matches target!")
-                        self.found_targets.add(fpath)
-                    break
-            total_score += (base_score + target_bonus)
+        search = self._target_re.search if self._target_re else None
+        for fpath, base_score in zip(filepaths, base_scores):
+            total_score += base_score
+            if search is None or search(fpath) is None:
+                continue
+            meta = _UNSET # 크기/내용 조건이 있는 규칙이 경로와 맞을 때만 추출
+            for target_path, min_size, content_key in self._target_rules:
+                if target_path not in fpath: continue
+                if min_size is not None or content_key is not None:
+                    if meta is _UNSET:
+                        meta = self._target_meta(fpath)
+                    if not meta: continue
+                    if min_size is not None and meta['size'] < min_size: continue
+                    if content_key is not None and content_key not in str(meta.get('content_summary', {})): continue
+
+                total_score += 500.0
+                if fpath not in self.found_targets:
+                    logger.info(f"[★ PRECISE MATCH] {fpath} matches target!")
+                    self.found_targets.add(fpath)
+                break
         return int(total_score)
             
-    def _launch_target(self, target_env):
-        # 실행 명령어 구성
-        cmd = self.config.get("binary_cmd", []).copy()
-        
-    def _launch_target(self, target_env):
+    def _target_meta(self, fpath):
+        """타겟 규칙 검사용 메타데이터. stat 한 번으로 (경로, mtime, 크기)가 같으면 캐시를 재사용 (LRU)"""
+        try:
+            st = os.stat(fpath)
+        except (OSError, ValueError):
+            return None
+        key = (fpath, st.st_mtime_ns, st.st_size)
+        cache = self._meta_cache
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        meta = cache[key] = self.extractor.extract_from_stat(fpath, st)
+        if len(cache) > META_CACHE_SIZE:
+            cache.popitem(last=False)
+        return meta
+
+    def _build_target_cmd(self):
+        """타겟 실행 명령어(앱 특화 플래그 포함)를 세션당 한 번만 구성. 크래시 복구 재실행은 그대로 재사용"""
         # 실행 명령어 구성
         cmd = self.config.get("binary_cmd", []).copy()
         
         # 앱 특화 플래그 (Chrome/Firefox/Electron 등)
+        app_lower = self.app_name.lower()
         is_electron = self.config.get("is_electron", False) or \
-                      any(k in self.app_name.lower() for k in ["chrome", "code", "discord", "electron"])
+                      any(k in app_lower for k in ELECTRON_APP_KEYWORDS)
         
         if is_electron:
              # Electron/Chromium 공통 필수 플래그
@@ -197,11 +519,14 @@ class ArtifactDiscoverySession:
              if user_dir_flag and not any(user_dir_flag in c for c in cmd):
                  cmd.append(f"{user_dir_flag}={self.chrome_user_dir}")
                  
-        elif "firefox" in self.app_name.lower():
+        elif "firefox" in app_lower:
                 pass
         else:
                 pass
+        return cmd
 
+    def _launch_target(self, target_env):
+        cmd = self._target_cmd
         logger.info(f"[Phase 2] Launching Target: {' '.join(cmd)}")
 
         if not cmd:
@@ -209,12 +534,39 @@ class ArtifactDiscoverySession:
             return None
 
         try:
-            proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, preexec_fn=os.setsid, env=target_env)
-            return proc
+            # 새 세션(setsid)으로 실행해야 종료 시 프로세스 그룹 전체를 정리할 수 있음
+            return SpawnedProcess(cmd, env=target_env)
         except FileNotFoundError:
             logger.error(f"Target executable not found: {cmd[0]}")
             return None
 
+    def _wait_target_ready(self, target_env, timeout=TARGET_READY_TIMEOUT):
+        """
+        타겟 프로세스의 창이 화면에 뜨면 바로 반환합니다. (고정 5초 대기 대체)
+        창을 찾지 못하거나 xdotool이 없으면 이전처럼 timeout까지 기다리고, 타겟이 죽으면 즉시 반환
+        """
+        try:
+            xdotool = spawn_kwargs("xdotool")
+        except FileNotFoundError:
+            time.sleep(timeout)
+            return False
+        deadline = time.monotonic() + timeout
+        cmd = ["xdotool", "search", "--onlyvisible", "--pid", str(self.proc.pid)]
+        while True:
+            try:
+                found = subprocess.run(cmd, env=target_env, stdout=subprocess.PIPE,
+                                       stderr=subprocess.DEVNULL, **xdotool).stdout.strip()
+                if found:
+                    logger.info(f"[Phase 2] Target window ready ({timeout - (deadline - time.monotonic()):.2f}s)")
+                    return True
+            except OSError: pass
+            if self.proc.poll() is not None:
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(TARGET_READY_POLL, remaining))
+
     def _launch_fuzzer(self, target_env):
         logger.info("[Phase 3] Starting Smart Fuzzer...")
         
@@ -234,13 +586,27 @@ class ArtifactDiscoverySession:
         cmd = [sys.executable, fuzzer_path, self.app_name, str(self.duration), self.runtime_config_path]
         logger.info(f"[DEBUG] Fuzzer CMD: {' '.join(cmd)}")
 
-        # [FIX] stdout도 PIPE로 연결
-        return subprocess.Popen(
-            cmd, 
-            env=target_env, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE
-        )
+        # stdout/stderr는 파이프 대신 세션 디렉터리의 파일로 (아무도 읽지 않는 파이프가 64KB에서 차면 퍼저가 멈춤)
+        # 재시작해도 이전 출력이 남도록 append. 부모 쪽 fd는 실행 직후 닫음
+        with open(self.fuzzer_output_path, "ab") as out:
+            return subprocess.Popen(
+                cmd, 
+                env=target_env, 
+                stdout=out, 
+                stderr=subprocess.STDOUT,
+                **spawn_kwargs(sys.executable)
+            )
+
+    def _fuzzer_output_tail(self, limit=4096):
+        """퍼저 출력 파일의 마지막 limit 바이트 (크래시 원인 확인용)"""
+        try:
+            with open(self.fuzzer_output_path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - limit))
+                return f.read().decode(errors="replace")
+        except OSError:
+            return ""
+
 
     def run(self):
         logger.info(f"[*] Starting Session for {self.app_name}")
@@ -254,191 +620,330 @@ class ArtifactDiscoverySession:
             self.tracer.start_trace(root_pid=0, target_name=target_proc) 
             time.sleep(2) 
             
-            # 환경변수 설정
-            target_env = os.environ.copy()
+            # 환경변수 설정: 미리 만든 환경에 Xvfb가 정한 디스플레이 값만 반영
+            target_env = self._child_env
             target_env["DISPLAY"] = ":99"
-            target_env["GTK_MODULES"] = "gail:atk-bridge" 
-            target_env["NO_AT_BRIDGE"] = "0"
-            target_env["PYTHONPATH"] = os.getcwd()
-            
-            if "DBUS_SESSION_BUS_ADDRESS" in os.environ:
-                target_env["DBUS_SESSION_BUS_ADDRESS"] = os.environ["DBUS_SESSION_BUS_ADDRESS"]
+            if "XAUTHORITY" in os.environ:
+                target_env["XAUTHORITY"] = os.environ["XAUTHORITY"]
 
             try:
                 subprocess.run(["killall", "at-spi-bus-launcher", "at-spi2-registryd"], stderr=subprocess.DEVNULL)
                 time.sleep(1)
                 # 백그라운드로 실행 (Orchestrator가 관리하지 않음)
-                subprocess.Popen(["/usr/libexec/at-spi-bus-launcher", "--launch-immediately"], env=target_env)
+                subprocess.Popen(["/usr/libexec/at-spi-bus-launcher", "--launch-immediately"], env=target_env, close_fds=False)
                 time.sleep(2)
             except Exception as e:
                 logger.warning(f"[-] Failed to restart AT-SPI: {e}")
                 
-            # [Robustness] Pass unique log path to fuzzer
-            self.fuzzer_log_path = os.path.join(self.output_dir, "fuzzer_debug.log")
-            target_env["FUZZER_LOG_PATH"] = self.fuzzer_log_path
-
             # Initial Launch
             self.proc = self._launch_target(target_env)
             if not self.proc: return
 
-            time.sleep(5) # 앱 실행 대기
+            target_backoff = RestartBackoff(TARGET_RESTART_DELAY, TARGET_RESTART_MAX_DELAY)
+            self._wait_target_ready(target_env) # 앱 실행 대기
             
             self.fuzzer_proc = self._launch_fuzzer(target_env)
+            fuzzer_backoff = RestartBackoff(FUZZER_RESTART_DELAY, FUZZER_RESTART_MAX_DELAY)
             
-            start_time = time.time()
+            start_time = time.monotonic() # 세션 길이는 NTP 보정 등 벽시계 변화와 무관하게 측정
             total_score = 0.0
             total_artifacts_count = 0
             
+            # 1초 고정 sleep 대신 tracer의 wakeup fd와 자식 종료 알림을 함께 기다림
+            loop_sel = selectors.DefaultSelector()
+            loop_sel.register(self.tracer.fileno(), selectors.EVENT_READ, "tracer")
+            children = ChildWatcher(loop_sel)
+            children.watch("target", self.proc)
+            children.watch("fuzzer", self.fuzzer_proc)
+            check_children = True # 감시 등록 전에 죽었을 수 있으므로 첫 바퀴는 점검
+            target_restart_at = None # 타겟 재실행 예정 시각 (대기 중에도 이벤트 드레인은 계속)
+            fuzzer_restart_at = None # 퍼저만 재시작할 예정 시각
+            
             try:
                 while True:
-                    if time.time() - start_time >= self.duration:
+                    if time.monotonic() - start_time >= self.duration:
                         logger.info("[DEBUG] Loop exiting: Duration expired.")
                         break
                     
-                    # [Self-Healing] Check Target Crash
-                    if self.proc.poll() is not None:
-                        logger.warning(f"[CRASH DETECTED] Target '{self.app_name}' died! Initiating Recovery...")
+                    # 자식 pidfd가 readable해졌거나 예약된 재시작 시각이면 크래시 점검 (감시 불가 시 매 바퀴)
+                    if check_children or target_restart_at is not None or fuzzer_restart_at is not None:
+                        # [Self-Healing] Check Target Crash
+                        if target_restart_at is None and self.proc.poll() is not None:
+                            logger.warning(f"[CRASH DETECTED] Target '{self.app_name}' died! Initiating Recovery...")
                         
-                        # 1. Kill Fuzzer
-                        if self.fuzzer_proc and self.fuzzer_proc.poll() is None:
-                            self.fuzzer_proc.terminate()
-                            self.fuzzer_proc.wait()
+                            # 1. Kill Fuzzer
+                            self._signal_children(signal.SIGTERM, target=False)
+                            self._reap_children(target=False)
+                            # 남은 그룹(렌더러 등)이 프로필 잠금(SingletonLock)을 쥔 채 남지 않도록 함께 정리
+                            try: os.killpg(self.proc.pid, signal.SIGKILL)
+                            except OSError: pass
+                            # 종료된 pidfd는 계속 readable이므로 재실행 전까지 감시 해제
+                            children.unwatch("target")
+                            children.unwatch("fuzzer")
+                            fuzzer_restart_at = None # 퍼저는 타겟 재실행과 함께 다시 띄움
+
+                            # 2. 실행 직후 반복해서 죽는 타겟을 빈틈없이 재실행하지 않도록 간격을 두고 예약
+                            target_restart_at = target_backoff.on_exit()
+                            delay = target_restart_at - time.monotonic()
+                            if delay > 0:
+                                logger.info(f"[Recovery] Relaunching target in {delay:.1f}s")
+
+                        if target_restart_at is not None and time.monotonic() >= target_restart_at:
+                            target_restart_at = None
                         
-                        # 2. Reset Environment
-                        self._setup_inputs()
+                            # 3. Reset Environment
+                            self._setup_inputs()
                         
-                        # 3. Relaunch Target
-                        self.proc = self._launch_target(target_env)
-                        if not self.proc:
-                            logger.error("[-] Failed to respawn target. Aborting.")
-                            break
-                        time.sleep(5)
+                            # 4. Relaunch Target
+                            self.proc = self._launch_target(target_env)
+                            children.watch("target", self.proc)
+                            if not self.proc:
+                                logger.error("[-] Failed to respawn target. Aborting.")
+                                break
+                            target_backoff.mark_started()
+                            self._wait_target_ready(target_env)
                         
-                        # 4. Relaunch Fuzzer
-                        self.fuzzer_proc = self._launch_fuzzer(target_env)
-                        logger.info("[Recovery] System restored.")
-
-                    # [Self-Healing] Check Fuzzer Crash
-                    if self.fuzzer_proc and self.fuzzer_proc.poll() is not None:
-                        out, err = self.fuzzer_proc.communicate()
-                        logger.error(f"[-] Fuzzer process died.")
-                        logger.error(f"    Stdout: {out.decode() if out else 'None'}")
-                        logger.error(f"    Stderr: {err.decode() if err else 'None'}")
-                        
-                        logger.info("[Recovery] Restarting Fuzzer only...")
-                        self.fuzzer_proc = self._launch_fuzzer(target_env)
-
-                    new_events = self.tracer.get_events()
+                            # 5. Relaunch Fuzzer (타겟이 곧바로 죽었으면 다음 바퀴의 재시작 예약으로 넘김)
+                            if self.proc.poll() is None:
+                                self.fuzzer_proc = self._launch_fuzzer(target_env)
+                                fuzzer_backoff.mark_started()
+                                children.watch("fuzzer", self.fuzzer_proc)
+                                logger.info("[Recovery] System restored.")
+
+                        # [Self-Healing] Check Fuzzer Crash
+                        if target_restart_at is None and fuzzer_restart_at is None and self.proc.poll() is None and \
+                           self.fuzzer_proc and self.fuzzer_proc.poll() is not None:
+                            logger.error(f"[-] Fuzzer process died.")
+                            logger.error(f"    Output ({self.fuzzer_output_path}): {self._fuzzer_output_tail() or 'None'}")
+                            children.unwatch("fuzzer")
+                            # 시작 직후 죽는 퍼저(import 오류, AT-SPI 미기동 등)를 pidfd가 깨우는 속도로 재시작하지 않도록 예약
+                            fuzzer_restart_at = fuzzer_backoff.on_exit()
+
+                        if fuzzer_restart_at is not None and time.monotonic() >= fuzzer_restart_at:
+                            fuzzer_restart_at = None
+                            logger.info("[Recovery] Restarting Fuzzer only...")
+                            self.fuzzer_proc = self._launch_fuzzer(target_env)
+                            fuzzer_backoff.mark_started()
+                            children.watch("fuzzer", self.fuzzer_proc)
+
+                    # 한 번에 가져오는 양을 제한해 폭주 구간에서도 크래시 점검/IPC 갱신 주기를 유지
+                    new_events = self.tracer.drain(max_batch=TRACER_BATCH)
                     if new_events:
-                        self.all_events.extend(new_events)
+                        self._aggregate_events(new_events)
                         total_artifacts_count += len(new_events)
                         
-                        reward = self.calculate_reward(new_events)
+                        reward = self.calculate_reward(new_events.filenames)
                         total_score += reward
-                        self.ipc_server.update_count(int(total_score))
+                        self._publish_score(total_score)
                         
                         if self.targets_config and len(self.found_targets) >= len(self.targets_config):
                              if not hasattr(self, '_mission_logged'):
                                 logger.info("[!!!] MISSION COMPLETE: All targets reproduced! (Continuing...)")
                                 self._mission_logged = True
                              pass 
-
-                    time.sleep(1)
+                    elif self._ipc_pending is not None:
+                        self._publish_score(self._ipc_pending)
+
+                    remaining = self.duration - (time.monotonic() - start_time)
+                    # 이벤트/자식 종료가 모두 selector를 깨우므로 고정 주기 없이 남은 시간까지 대기
+                    # (pidfd 감시가 불가하면 최소 1초마다 상태 점검)
+                    timeout = remaining if children.active else min(1.0, remaining)
+                    if self._ipc_pending is not None: # 보류된 점수를 보낼 시각에 맞춰 깨어남
+                        timeout = min(timeout, self._last_ipc + IPC_MIN_INTERVAL - time.monotonic())
+                    for restart_at in (target_restart_at, fuzzer_restart_at): # 예약된 재시작 시각에 맞춰 깨어남
+                        if restart_at is not None:
+                            timeout = min(timeout, restart_at - time.monotonic())
+                    check_children = not children.active
+                    for key, _ in loop_sel.select(timeout=max(0.0, timeout)):
+                        if key.data == "tracer":
+                            self.tracer.clear_wakeup()
+                        else: # "target" / "fuzzer" 종료
+                            check_children = True
             except KeyboardInterrupt: pass
+            finally:
+                children.close()
+                loop_sel.close()
 
             logger.info("[Phase 3.5] Draining remaining events...")
-            final_events = self.tracer.get_events()
+            final_events = self.tracer.drain()
             if final_events:
-                self.all_events.extend(final_events)
+                self._aggregate_events(final_events)
                 total_artifacts_count += len(final_events)
-                total_score += self.calculate_reward(final_events)
+                total_score += self.calculate_reward(final_events.filenames)
                 logger.info(f"[+] Final Artifact Count: {total_artifacts_count} | Final Score: {total_score:.1f}")
-                self.ipc_server.update_count(int(total_score))
+            if final_events or self._ipc_pending is not None:
+                self._publish_score(total_score, force=True)
 
             logger.info("[Phase 4] Stopping experiment...")
             self._cleanup()
 
         self._analyze_results()
 
+    def _signal_children(self, sig, fuzzer=True, target=True):
+        """퍼저와 타겟 프로세스 그룹(타겟은 setsid로 실행 -> pgid == pid)에 시그널 전송"""
+        if fuzzer and self.fuzzer_proc and self.fuzzer_proc.poll() is None:
+            try: self.fuzzer_proc.send_signal(sig)
+            except OSError: pass
+        if target and self.proc:
+            try: os.killpg(self.proc.pid, sig)
+            except OSError: pass
+
+    def _reap_children(self, grace=KILL_GRACE, target_grace=TARGET_KILL_GRACE, fuzzer=True, target=True):
+        """SIGTERM 이후 각자의 유예 시간(퍼저 grace, 타겟 target_grace) 안에 끝나지 않은 쪽만 SIGKILL로 정리하고 회수"""
+        start = time.monotonic()
+        procs = [(p, is_target, start + limit) for p, is_target, wanted, limit in
+                 ((self.fuzzer_proc, False, fuzzer, grace), (self.proc, True, target, target_grace)) if p and wanted]
+        for proc, is_target, deadline in procs:
+            try:
+                proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                pass
+            if is_target:
+                # 리더가 끝났어도 그룹에 남은 자식(Chrome 렌더러 등)까지 함께 정리
+                try: os.killpg(proc.pid, signal.SIGKILL)
+                except OSError: pass
+            elif proc.poll() is None:
+                proc.kill()
+            proc.wait()
+
     def _cleanup(self):
-        if self.fuzzer_proc: self.fuzzer_proc.terminate()
+        # 종료 시그널을 먼저 모두 보내 두 프로세스의 종료가 IPC/tracer 정리와 겹치도록 함
+        self._signal_children(signal.SIGTERM)
         self.ipc_server.stop()
         self.tracer.stop_trace()
-        if self.proc:
-            try: os.killpg(os.getpgid(self.proc.pid), signal.SIGTERM)
-            except: pass
+        self._reap_children()
+
+    def _publish_score(self, score, force=False):
+        """점수를 IPC로 전송하되 IPC_MIN_INTERVAL 안의 갱신은 보류했다가 마지막 값만 보냄"""
+        now = time.monotonic()
+        if force or now - self._last_ipc >= IPC_MIN_INTERVAL:
+            self.ipc_server.update_count(int(score))
+            self._last_ipc = now
+            self._ipc_pending = None
+        else:
+            self._ipc_pending = score
+
+    def _aggregate_events(self, batch):
+        """
+        드레인한 이벤트 배치(EventBatch, 열 단위)를 파일 단위로 바로 집계합니다. (원시 이벤트는 보관하지 않음)
+        이벤트 단위 파이썬 루프 대신 열을 zip/set/dict(C 레벨)로 묶고,
+        파이썬 루프는 새 파일 및 중복 제거된 (파일, 값) 쌍에 대해서만 수행
+        """
+        artifacts = self.unique_artifacts
+        fnames = batch.filenames
+        # 뒤에서부터 채우면 파일별로 배치 내 가장 이른 이벤트 시각이 남음
+        first_seen = dict(zip(reversed(fnames), reversed(batch.timestamps)))
+        for fname in dict.fromkeys(fnames): # 첫 등장 순서 유지
+            if fname not in artifacts:
+                artifacts[fname] = [first_seen[fname], 0, 0]
+
+        # syscall 종류/프로세스는 tracer가 부여한 정수 ID를 비트로 모으고 보고서 작성 시 이름으로 변환
+        score_cache, invalidating = self._score_cache, self._invalidating_types
+        for fname, type_id in set(zip(fnames, batch.type_ids)):
+            artifacts[fname][1] |= 1 << type_id
+            if type_id in invalidating:
+                score_cache.pop(fname, None)
+        for fname, proc_id in set(zip(fnames, batch.proc_ids)):
+            artifacts[fname][2] |= 1 << proc_id
 
     def _analyze_results(self):
         logger.info("[Phase 5] Analyzing captured artifacts...")
-        events = self.all_events
         
-        actions = []
-        actions = []
+        # 행동 시각/설명을 행동마다 dict로 만들지 않고 두 개의 평행 배열로 보관
+        action_times = array('d')
+        action_descs = []
         # Use the log path defined in run() or default to legacy path if not found
         log_path = getattr(self, 'fuzzer_log_path', "/tmp/fuzzer_debug.log")
         
-        import re
-        from datetime import datetime
-        
         if os.path.exists(log_path):
             try:
-                with open(log_path, "r", errors='ignore') as f:
-                    for line in f:
-                        if "[Action]" in line:
-                            try:
-                                time_match = re.search(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})', line)
-                                if not time_match: continue
-                                dt = datetime.strptime(time_match.group(1), "%Y-%m-%d %H:%M:%S")
-                                action_desc = line.split("[Action]")[-1].strip()
-                                actions.append({"time": dt.timestamp(), "action": action_desc})
-                            except: continue
-                logger.info(f"Parsed {len(actions)} fuzzer actions from log")
+                hour_epochs = {}
+                # 모든 줄을 파이썬으로 순회하지 않고 mmap에서 [Action] 위치만 C 레벨(find)로 건너뛰며 찾음.
+                # 해당 줄만 줄 맨 앞의 시각을 매치하고, 마지막 [Action] 뒤의 설명 부분만 디코딩
+                with open(log_path, "rb") as f:
+                    if os.fstat(f.fileno()).st_size: # 빈 파일은 mmap 불가
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as log_map:
+                            find, rfind, ts_match = log_map.find, log_map.rfind, LOG_TS_RE.match
+                            pos = find(ACTION_MARKER)
+                            while pos >= 0:
+                                start = rfind(b"\n", 0, pos) + 1
+                                end = find(b"\n", pos)
+                                if end < 0: end = len(log_map)
+                                try:
+                                    time_match = ts_match(log_map, start)
+                                    if time_match:
+                                        line = log_map[start:end]
+                                        action_desc = line.rpartition(ACTION_MARKER)[2].strip().decode(errors='ignore')
+                                        action_times.append(_log_timestamp(time_match, hour_epochs))
+                                        action_descs.append(action_desc)
+                                except: pass
+                                pos = find(ACTION_MARKER, end) # 같은 줄의 다른 [Action]은 건너뜀
+                logger.info(f"Parsed {len(action_descs)} fuzzer actions from log")
             except Exception as e:
                 logger.warning(f"Error reading fuzzer log: {e}")
 
-        unique_artifacts = {}
-        for e in events:
-            fname = e['filename']
-            created_time = e['timestamp']
-            
-            if fname not in unique_artifacts:
-                likely_cause = "Unknown (Background)"
-                best_gap = 5.0 
-                if actions:
-                    for act in reversed(actions):
-                        gap = created_time - act['time']
-                        if 0 <= gap < best_gap:
-                            likely_cause = act['action']
-                            break
-                
-                unique_artifacts[fname] = {"syscalls": set(), "processes": set(), "cause_action": likely_cause}
-            
-            unique_artifacts[fname]["syscalls"].add(e['type'])
-            unique_artifacts[fname]["processes"].add(e['process_name'])
-
-        report = []
-        for filepath, data in unique_artifacts.items():
-            exists = os.path.exists(filepath)
-            meta = self.extractor.extract(filepath) if exists else "File Deleted or Inaccessible"
-            artifact_entry = {
-                "filepath": filepath,
-                "cause_action": data["cause_action"],
-                "interactions": list(data["syscalls"]),
-                "accessed_by": list(data["processes"]),
-                "exists_on_disk": exists,
-                "metadata": meta
-            }
-            report.append(artifact_entry)
-
+        # 파일 단위 집계는 실행 중에 끝나 있으므로 원인 행동만 매칭
+        # 행동을 시각순으로 정렬해 두고 파일마다 이분 탐색 (O(파일 수 x log 행동 수))
+        # 로그는 시간순으로 쌓이므로 보통 이미 정렬되어 있고, 아닐 때만 안정 정렬(같은 시각이면 로그 순서 유지)
+        if any(b < a for a, b in zip(action_times, action_times[1:])):
+            order = sorted(range(len(action_times)), key=action_times.__getitem__)
+            action_times = array('d', (action_times[i] for i in order))
+            action_descs = [action_descs[i] for i in order]
+        unique_artifacts = self.unique_artifacts
+        causes = []
+        for created_time, _, _ in unique_artifacts.values():
+            likely_cause = "Unknown (Background)"
+            best_gap = 5.0 
+            # created_time 이전(같은 시각 포함)의 가장 최근 행동만 후보
+            idx = bisect.bisect_right(action_times, created_time) - 1
+            if idx >= 0 and created_time - action_times[idx] < best_gap:
+                likely_cause = action_descs[idx]
+            causes.append(likely_cause)
+
+        # 보고서 전체를 리스트로 들고 있다가 한 번에 dump하지 않고 항목마다 바로 기록.
+        # 형식은 기존과 같은 JSON 배열(항목당 한 줄)이라 run_pipeline/reconstruct_scenario는 그대로 읽음
         output_json = os.path.join(self.output_dir, "artifact_footprint.json")
+        # FOOTPRINT_GZIP=1이면 긴 세션의 큰 보고서를 gzip(빠른 레벨 1)으로 압축해 .json.gz로 저장
+        if os.environ.get("FOOTPRINT_GZIP") == "1":
+            output_json += ".gz"
+            open_report = lambda path: gzip.open(path, "wb", compresslevel=1)
+        else:
+            open_report = lambda path: open(path, "wb")
         try:
-            with open(output_json, "w") as f:
-                json.dump(report, f, indent=2, default=str)
+            type_name, proc_names = self.tracer.type_name, self.tracer.proc_names
+
+            def extract(filepath):
+                # 존재 확인과 메타데이터 추출이 같은 stat 결과를 사용 (stat 한 번, 확인-사용 사이 경쟁 없음)
+                try:
+                    st = os.stat(filepath)
+                except (OSError, ValueError):
+                    return False, "File Deleted or Inaccessible"
+                return True, self.extractor.extract_from_stat(filepath, st)
+
+            # 추출은 스레드 풀에서 병렬로 돌리고(I/O 중 GIL 해제), map이 입력 순서대로 돌려주므로 기록은 순차 유지
+            with open_report(output_json) as f, \
+                 ThreadPoolExecutor(max_workers=EXTRACT_WORKERS) as pool:
+                f.write(b"[")
+                sep = b"\n"
+                results = pool.map(extract, unique_artifacts)
+                for (filepath, (_, syscalls, processes)), cause, (exists, meta) in zip(
+                        unique_artifacts.items(), causes, results):
+                    artifact_entry = {
+                        "filepath": filepath,
+                        "cause_action": cause,
+                        "interactions": list(map(type_name, _mask_ids(syscalls))),
+                        "accessed_by": [proc_names[p] for p in _mask_ids(processes)],
+                        "exists_on_disk": exists,
+                        "metadata": meta
+                    }
+                    f.write(sep)
+                    f.write(_dumps(artifact_entry))
+                    sep = b",\n"
+                f.write(b"\n]\n")
             logger.info(f"[Success] Report saved to {output_json}")
         except Exception as e:
             logger.error(f"Failed to save report: {e}")
 
-
 if __name__ == "__main__":
     app = "Google Chrome"
     dur = 120
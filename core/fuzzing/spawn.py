@@ -0,0 +1,25 @@
+import os
+import shutil
+import functools
+
+# CPython의 subprocess는 아래 조건을 모두 만족할 때만 fork+exec 대신 posix_spawn(vfork 기반)을 사용:
+#   - 실행 파일이 절대 경로 (상대 이름은 PATH 탐색 때문에 fork 경로로 빠짐)
+#   - close_fds=False, preexec_fn/cwd/start_new_session 미사용
+#   - stdin/stdout/stderr를 지정한 경우 그 fd가 0~2가 아님 (PIPE/DEVNULL/파일은 해당 없음)
+# 파이썬(및 bcc)이 여는 fd는 기본적으로 non-inheritable이라 close_fds=False여도 자식에 새지 않음.
+# bcc/LLVM을 적재한 오케스트레이터나 dogtail 퍼저에서 fork 시 페이지 테이블 복사를 피하기 위함.
+
+@functools.lru_cache(maxsize=None)
+def _which(name):
+    return shutil.which(name)
+
+def resolve_executable(name):
+    """name의 절대 경로. 경로가 주어지면 그대로(절대화), 이름이면 PATH에서 찾음 (결과 캐시). 없으면 FileNotFoundError"""
+    path = name if os.path.dirname(name) else _which(name)
+    if not path:
+        raise FileNotFoundError(name)
+    return os.path.abspath(path)
+
+def spawn_kwargs(name):
+    """posix_spawn 경로를 타도록 하는 Popen/run 인자 (args[0]은 그대로 두고 executable만 절대 경로로 지정)"""
+    return {"executable": resolve_executable(name), "close_fds": False}
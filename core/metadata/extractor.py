@@ -1,14 +1,26 @@
 import os
+import re
+import stat
 import json
 import yaml
 import sqlite3
 import hashlib
 import magic  # pip install python-magic
 import string
+import threading
 import xml.etree.ElementTree as ET
 from dataclasses import dataclass, asdict
 from typing import Dict, Any, Optional
 
+# 포렌식 가치 점수 규칙 (calculate_forensic_score)
+HIGH_VALUE_KEYWORDS = (
+    "history", "login", "password", "credential", "token", "cookie",
+    "session", "preferences", "local state", "wallet", "secret", "key"
+)
+STRUCTURED_EXTENSIONS = (".db", ".sqlite", ".json", ".xml", ".conf", ".ini")
+# 키워드 목록을 경로마다 순회하지 않도록 하나의 alternation으로 컴파일 (C 레벨 스캔 한 번)
+HIGH_VALUE_RE = re.compile("|".join(map(re.escape, HIGH_VALUE_KEYWORDS)))
+
 @dataclass
 class ArtifactMetadata:
     filepath: str
@@ -21,20 +33,36 @@ class ArtifactMetadata:
 
 class MetadataExtractor:
     def __init__(self):
-        self.magic = magic.Magic(mime=True)
+        # libmagic 핸들(magic_t)은 스레드 간 공유가 안전하지 않으므로 스레드마다 하나씩 생성
+        self._local = threading.local()
+
+    @property
+    def magic(self):
+        m = getattr(self._local, "magic", None)
+        if m is None:
+            m = self._local.magic = magic.Magic(mime=True)
+        return m
 
     def extract(self, filepath: str) -> Optional[Dict]:
-        if not os.path.exists(filepath) or os.path.isdir(filepath):
+        # exists/isdir/stat 세 번 대신 stat 한 번으로 판정
+        try:
+            st = os.stat(filepath)
+        except (OSError, ValueError):
+            return None
+        return self.extract_from_stat(filepath, st)
+
+    def extract_from_stat(self, filepath: str, st: os.stat_result) -> Optional[Dict]:
+        """호출 측이 이미 구한 stat 결과로 메타데이터를 추출 (stat 재호출 없음)"""
+        if stat.S_ISDIR(st.st_mode):
             return None
 
         try:
-            stat = os.stat(filepath)
             mime = self.magic.from_file(filepath)
             
             metadata = ArtifactMetadata(
                 filepath=filepath,
                 filename=os.path.basename(filepath),
-                size=stat.st_size,
+                size=st.st_size,
                 mime_type=mime,
                 sha256=self._get_sha256(filepath),
                 file_entropy=self._calculate_entropy(filepath),
@@ -69,35 +97,38 @@ class MetadataExtractor:
         파일의 경로, 확장자, 엔트로피를 기반으로 '포렌식 가치 점수'를 즉시 계산합니다.
         실시간 피드백을 위해 무거운 작업(SHA256 등)은 생략합니다.
         """
-        score = 1.0 # 기본 점수 (발견함)
-        
-        if not os.path.exists(filepath):
-            return 0.5 # 생성되었으나 즉시 삭제됨 (Transient) -> 낮은 점수
-            
-        try:
-            # 1. 키워드 분석 (High Value Targets)
-            path_lower = filepath.lower()
-            high_value_keywords = [
-                "history", "login", "password", "credential", "token", "cookie", 
-                "session", "preferences", "local state", "wallet", "secret", "key"
-            ]
-            if any(kw in path_lower for kw in high_value_keywords):
-                score += 50.0
-
-            # 2. 확장자/유형 분석 (Structured Data)
-            if any(path_lower.endswith(ext) for ext in [".db", ".sqlite", ".json", ".xml", ".conf", ".ini"]):
-                score += 20.0
-            
-            # 3. 엔트로피 분석 (Information Density)
-            # 파일 앞부분만 읽어서 빠르게 계산
-            entropy = self._calculate_entropy(filepath, limit=2048)
-            if entropy > 5.0:
-                score += 10.0
-            
-            return score
-            
-        except:
-            return 1.0 # 에러 시 기본 점수만 부여
+        return self.calculate_forensic_score_batch([filepath])[0]
+
+    def calculate_forensic_score_batch(self, filepaths) -> list:
+        """
+        여러 경로의 포렌식 가치 점수를 한 번에 계산합니다. (tracer 배치 단위 호출용)
+        키워드는 컴파일된 정규식 한 번, 확장자는 endswith(tuple) 한 번으로 판정
+        """
+        keyword_search = HIGH_VALUE_RE.search
+        scores = []
+        for filepath in filepaths:
+            if not os.path.exists(filepath):
+                scores.append(0.5) # 생성되었으나 즉시 삭제됨 (Transient) -> 낮은 점수
+                continue
+            score = 1.0 # 기본 점수 (발견함)
+            try:
+                # 1. 키워드 분석 (High Value Targets)
+                path_lower = filepath.lower()
+                if keyword_search(path_lower):
+                    score += 50.0
+
+                # 2. 확장자/유형 분석 (Structured Data)
+                if path_lower.endswith(STRUCTURED_EXTENSIONS):
+                    score += 20.0
+
+                # 3. 엔트로피 분석 (Information Density)
+                # 파일 앞부분만 읽어서 빠르게 계산
+                if self._calculate_entropy(filepath, limit=2048) > 5.0:
+                    score += 10.0
+            except:
+                score = 1.0 # 에러 시 기본 점수만 부여
+            scores.append(score)
+        return scores
 
     def _get_sha256(self, filepath: str) -> str:
         sha = hashlib.sha256()
@@ -108,7 +139,7 @@ class MetadataExtractor:
             return sha.hexdigest()
         except: return "hash_error"
 
-    def _calculate_entropy(self, filepath: str, limi: int = 4096) -> float:
+    def _calculate_entropy(self, filepath: str, limit: int = 4096) -> float:
         import math
         try:
             with open(filepath, 'rb') as f:
@@ -1,9 +1,11 @@
 import json
+import gzip
 import sys
 
 def load_data(filepath):
     try:
-        with open(filepath, 'r') as f:
+        opener = gzip.open if filepath.endswith(".gz") else open
+        with opener(filepath, 'rt') as f:
             return json.load(f)
     except Exception as e:
         print(f"[-] Error loading JSON: {e}")
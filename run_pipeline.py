@@ -1,6 +1,7 @@
 import sys
 import os
 import json
+import gzip
 import logging
 from core.db.graph_store import ArtifactGraph
 from core.llm.classifier import D3FENDMapper
@@ -12,7 +13,9 @@ def process_experiment(json_path, app_name, llm_provider="ollama"):
         print(f"[-] Error: File not found: {json_path}")
         return
 
-    with open(json_path, 'r') as f:
+    # 오케스트레이터가 FOOTPRINT_GZIP=1로 저장한 .json.gz도 그대로 읽음
+    opener = gzip.open if json_path.endswith(".gz") else open
+    with opener(json_path, 'rt') as f:
         artifacts = json.load(f)
     
     print(f"[*] Found {len(artifacts)} raw events.")